@@ -0,0 +1,71 @@
+"""
+
+Память, занимаемая результатами массового опроса: модели pydantic и лёгкие записи (records=True).
+Ответ каждого учащегося разбирается из собственных bytes, как при реальных запросах, поэтому
+одинаковые названия предметов и ссылки у разных учащихся - разные объекты, пока их не объединят лёгкие записи.
+Запуск: python benchmarks/memory.py [число учащихся] [строк на учащегося]
+
+"""
+import asyncio
+import gc
+import json
+import sys
+import tracemalloc
+from datetime import date, timedelta
+
+from parsing import OfflineClient, marks_payload, notifications_payload
+
+
+def homeworks_payload(rows):
+    start = date(2024, 9, 1)
+    return {'payload': [
+        {'subject_name': f'Предмет {i % 15}', 'date': str(start + timedelta(i % 120)),
+         'description': f'Упражнения {i % 40}', 'homework_entry_id': i,
+         'additional_materials': [
+             {'type': 'attachments', 'items': [{'link': f'https://school.mos.ru/files/{i % 60}.pdf'}] * (i % 2)},
+             {'type': 'test_spec_binding', 'items': []}
+         ]}
+        for i in range(rows)
+    ]}
+
+
+class RawClient(OfflineClient):
+    """
+    Клиент без сети, разбирающий ответ из bytes при каждом запросе
+
+    """
+
+    async def make_request(self, method, **query_options):
+        return json.loads(self.payload)
+
+
+async def retained(method, body, students, records):
+    """
+    Объём памяти (байт), который занимают результаты method для students учащихся
+
+    """
+    gc.collect()
+    tracemalloc.start()
+    client = await RawClient(body, records=records)
+    results = [await getattr(client, method)() for _ in range(students)]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    return size
+
+
+async def main(students, rows):
+    payloads = (('get_marks', marks_payload(rows)), ('get_homeworks', homeworks_payload(rows)),
+                ('get_notifications', notifications_payload(rows)))
+    for method, payload in payloads:
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        models = await retained(method, body, students, records=False)
+        records = await retained(method, body, students, records=True)
+        print(f'{method:<20} models: {models / 2 ** 20:>8.1f} MiB   '
+              f'records: {records / 2 ** 20:>8.1f} MiB   x{models / records:.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+                     int(sys.argv[2]) if len(sys.argv) > 2 else 200))
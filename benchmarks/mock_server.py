@@ -0,0 +1,279 @@
+"""
+
+Локальный сервер, имитирующий API school.mos.ru, для тестов и замеров без сети.
+Отвечает на все методы Client правдоподобными данными; размер списков задаётся параметром rows.
+Запуск: python benchmarks/mock_server.py [--port 8765] [--rows 100] [--latency 0] [--http2]
+Клиент: aiomes.Client(token, transport=aiomes.Transport(base_url='http://127.0.0.1:8765/api/'))
+HTTP/2: aiomes.HTTP2Transport(http1=False, base_url='http://127.0.0.1:8765/api/')
+
+"""
+import argparse
+import asyncio
+import json
+from datetime import date, timedelta
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+
+SUBJECTS = ('Алгебра', 'Геометрия', 'Русский язык', 'Литература', 'Физика', 'Химия', 'Биология', 'История',
+            'Обществознание', 'География', 'Английский язык', 'Информатика', 'Физическая культура', 'ОБЖ',
+            'Разговоры о важном')
+CONTROL_FORMS = ('Ответ на уроке', 'Самостоятельная работа', 'Контрольная работа', 'Домашняя работа', None)
+LESSON_TIMES = (('08:30', '09:15'), ('09:25', '10:10'), ('10:30', '11:15'), ('11:35', '12:20'),
+                ('12:35', '13:20'), ('13:30', '14:15'), ('14:25', '15:10'), ('15:20', '16:05'))
+
+
+def _days(query):
+    start, end = date.fromisoformat(query['from']), date.fromisoformat(query['to'])
+    return [start + timedelta(i) for i in range((end - start).days + 1)] or [start]
+
+
+def _spread(days, rows):
+    """
+    rows записей, равномерно распределённых по датам days
+
+    """
+    for i in range(rows):
+        yield i, days[i * len(days) // rows]
+
+
+def profile(query, rows):
+    return {'children': [{
+        'id': 1000 + i, 'contingent_guid': f'00000000-0000-0000-0000-{i:012d}',
+        'first_name': 'Иван', 'middle_name': 'Иванович', 'last_name': f'Иванов-{i}', 'birth_date': '2010-05-01',
+        'class_level_id': 9 - i, 'class_name': f'{9 - i}-А', 'class_unit_id': 2000 + i, 'school': {'id': 500},
+        'contract_id': 3000 + i, 'snils': '000-000-000 00', 'phone': '+70000000000',
+        'representatives': [{'first_name': 'Пётр', 'last_name': 'Иванов'}]
+    } for i in range(2)]}
+
+
+def schedule(query, rows):
+    return {'activities': [{
+        'type': 'LESSON', 'room_number': str(100 + i), 'begin_time': LESSON_TIMES[i % 8][0],
+        'end_time': LESSON_TIMES[i % 8][1],
+        'lesson': {'subject_name': SUBJECTS[i % len(SUBJECTS)], 'lesson_education_type': 'OO',
+                   'replaced': i % 7 == 3,
+                   'marks': [{'value': str(3 + i % 3), 'weight': '¹²'[i % 2]}] if i % 3 == 0 else []}
+    } for i in range(min(rows, 8))]}
+
+
+def schedule_short(query, rows):
+    return {'payload': [{'date': day, 'lessons': [{
+        'subject_name': SUBJECTS[i % len(SUBJECTS)], 'group_name': f'{SUBJECTS[i % len(SUBJECTS)]} 9-А',
+        'begin_time': LESSON_TIMES[i % 8][0], 'end_time': LESSON_TIMES[i % 8][1], 'lesson_education_type': 'OO'
+    } for i in range(min(rows, 8))]} for day in query['dates'].split(',')]}
+
+
+def periods_schedules(query, rows):
+    return [{'periods': [
+        {'name': '1 триместр', 'begin_date': '2024-09-02', 'end_date': '2024-11-30'},
+        {'name': 'Осенние каникулы', 'begin_date': '2024-10-26', 'end_date': '2024-11-04'},
+        {'name': '2 триместр', 'begin_date': '2024-12-01', 'end_date': '2025-02-28'},
+        {'name': '3 триместр', 'begin_date': '2025-03-01', 'end_date': '2025-05-31'}
+    ]}]
+
+
+def homeworks(query, rows):
+    return {'payload': [{
+        'homework_entry_id': 10_000_000 + i, 'subject_name': SUBJECTS[i % len(SUBJECTS)],
+        'date': str(day), 'description': f'Параграф {1 + i % 40}, упражнения {i % 300}-{i % 300 + 5}',
+        'additional_materials': [
+            {'type': 'attachments', 'items': [{'link': f'https://school.mos.ru/files/{i}.pdf'}] if i % 4 == 0 else []},
+            {'type': 'test_spec_binding',
+             'items': [{'urls': [{'url': f'https://uchebnik.mos.ru/test/{i}'}]}] if i % 5 == 0 else []}
+        ]
+    } for i, day in _spread(_days(query), rows)]}
+
+
+def marks(query, rows):
+    return {'payload': [{
+        'id': 20_000_000 + i, 'subject_name': SUBJECTS[i % len(SUBJECTS)], 'date': str(day),
+        'value': str(2 + i % 4), 'weight': 1 + i % 3, 'control_form_name': CONTROL_FORMS[i % len(CONTROL_FORMS)]
+    } for i, day in _spread(_days(query), rows)]}
+
+
+def progress(query, rows):
+    return [{
+        'subject_name': subject,
+        'periods': [{
+            'avg_five': f'{3.5 + (s + p) % 3 / 2:.2f}', 'final_mark': str(4 + (s + p) % 2) if p < 2 else None,
+            'marks': [{'values': [{'original': str(2 + (s + m) % 4)}], 'weight': 1 + m % 3}
+                      for m in range(max(1, rows // len(SUBJECTS)))]
+        } for p in range(3)]
+    } for s, subject in enumerate(SUBJECTS)]
+
+
+def final_marks_prev_year(query, rows):
+    return [{'subject_name': subject, 'value': 3 + i % 3} for i, subject in enumerate(SUBJECTS)]
+
+
+def school_info(query, rows):
+    return {'name': 'ГБОУ Школа № 1', 'principal': 'Петров Пётр Петрович',
+            'address': {'address': 'г. Москва, ул. Тверская, д. 1'}, 'site': 'https://sch1.mskobr.ru',
+            'email': 'sch1@edu.mos.ru', 'branches': [{'id': i} for i in range(3)]}
+
+
+def menu(query, rows):
+    return {'menu': [{
+        'title': f'Комплекс {i + 1}', 'summary': 9000 + i * 500,
+        'meals': [{'name': f'Блюдо {i}-{j}', 'ingredients': 'Мука, молоко, яйцо, сахар',
+                   'nutrition': {'calories': 150.5 + j}} for j in range(4)]
+    } for i in range(min(rows, 10))]}
+
+
+def menu_buffet(query, rows):
+    return {'menu': [{'items': [{
+        'name': f'Выпечка {i}', 'full_name': f'Булочка с начинкой № {i}', 'available_now': i % 4 != 0,
+        'price': 4500 + i * 100
+    } for i in range(min(rows, 50))]}]}
+
+
+def visits(query, rows):
+    return {'payload': [{
+        'date': str(day), 'visits': [{'in': '08:21', 'out': '15:02', 'duration': '6 ч. 41 мин.'}]
+    } for day in _days(query)[:rows]]}
+
+
+def notifications(query, rows):
+    return [{
+        'datetime': f'2024-10-{1 + i % 28:02d} {8 + i % 10:02d}:{i % 60:02d}:00.000',
+        'event_type': 'create_mark' if i % 3 else 'create_homework', 'subject_name': SUBJECTS[i % len(SUBJECTS)],
+        'new_mark_value': str(2 + i % 4) if i % 3 else None, 'new_mark_weight': 1 + i % 3 if i % 3 else None,
+        'new_hw_description': None if i % 3 else f'Параграф {i % 40}'
+    } for i in range(rows)]
+
+
+def rank_short(query, rows):
+    start, end = date.fromisoformat(query['beginDate']), date.fromisoformat(query['endDate'])
+    return [{'date': str(start + timedelta(i)), 'rankPlace': 1 + i % 25}
+            for i in range((end - start).days + 1)]
+
+
+def person_details(query, rows):
+    return {'documents': [
+        {'document_type_id': 1, 'series': '4500', 'number': '000000', 'issue_date': '2024-05-20',
+         'issuer': 'ГУ МВД России по г. Москве'},
+        {'document_type_id': 2, 'series': None, 'number': 'IV-МЮ 000000', 'issue_date': '2010-05-10',
+         'issuer': 'Отдел ЗАГС'}
+    ]}
+
+
+def subjects(query, rows):
+    return {'payload': [{'subject_id': i, 'subject_name': subject} for i, subject in enumerate(SUBJECTS)]}
+
+
+FIXTURES = {
+    'family/web/v1/profile': profile,
+    'family/web/v1/schedule': schedule,
+    'family/web/v1/schedule/short': schedule_short,
+    'ej/core/family/v1/periods_schedules': periods_schedules,
+    'family/web/v1/homeworks': homeworks,
+    'family/web/v1/marks': marks,
+    'ej/report/family/v1/progress/json': progress,
+    'ej/core/family/v1/final_marks_prev_year': final_marks_prev_year,
+    'family/web/v1/school_info': school_info,
+    'family/web/v1/menu': menu,
+    'family/web/v1/menu/buffet': menu_buffet,
+    'family/web/v1/visits': visits,
+    'family/web/v1/notifications/search': notifications,
+    'ej/rating/v1/rank/rankShort': rank_short,
+    'family/web/v1/person-details': person_details,
+    'family/web/v1/subjects/list': subjects
+}
+
+
+def make_responder(rows=100, latency=0.0, prefix='/api/'):
+    """
+    Обработчик запросов, общий для серверов HTTP/1.1 и HTTP/2. Тела ответов строятся один раз для каждого запроса
+    (путь и параметры) и затем отдаются из памяти, чтобы сам сервер не влиял на замеры клиента
+    :param rows: Размер списков в ответах (оценки, Д/З, уведомления, ...)
+    :param latency: Искусственная задержка ответа в секундах
+    :param prefix: Префикс пути API
+    :return: Корутинная функция respond(path, query_string, headers) -> (status, body)
+
+    """
+    bodies = {}
+
+    async def respond(path, query_string, headers):
+        if 'auth-token' not in headers:
+            return 401, b'{}'
+        if latency:
+            await asyncio.sleep(latency)
+
+        key = f'{path}?{query_string}'
+        body = bodies.get(key)
+        if body is None:
+            fixture = FIXTURES.get(path[len(prefix):])
+            if fixture is None:
+                return 404, b'{}'
+            query = dict(parse_qsl(query_string))
+            body = bodies[key] = json.dumps(fixture(query, rows), ensure_ascii=False).encode()
+        return 200, body
+
+    return respond
+
+
+def make_app(rows=100, latency=0.0, prefix='/api/') -> web.Application:
+    """
+    Приложение aiohttp (HTTP/1.1) с имитацией API
+
+    """
+    respond = make_responder(rows, latency, prefix)
+
+    async def handler(request):
+        status, body = await respond(request.path, request.query_string, request.headers)
+        return web.Response(status=status, body=body, content_type='application/json')
+
+    app = web.Application()
+    app.router.add_route('GET', prefix + '{method:.*}', handler)
+    return app
+
+
+def make_asgi_app(rows=100, latency=0.0, prefix='/api/'):
+    """
+    ASGI-приложение с имитацией API для серверов с поддержкой HTTP/2 (hypercorn)
+
+    """
+    respond = make_responder(rows, latency, prefix)
+
+    async def app(scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        headers = {name.decode('latin-1'): value for name, value in scope['headers']}
+        status, body = await respond(scope['path'], scope['query_string'].decode(), headers)
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    return app
+
+
+def serve(host='127.0.0.1', port=8765, rows=100, latency=0.0, http2=False):
+    """
+    :param http2: Сервер HTTP/2 без TLS (h2c, нужен пакет hypercorn) вместо aiohttp
+
+    """
+    if not http2:
+        web.run_app(make_app(rows, latency), host=host, port=port, print=None)
+        return
+
+    from hypercorn.asyncio import serve as hypercorn_serve
+    from hypercorn.config import Config
+    config = Config()
+    config.bind = [f'{host}:{port}']
+    config.accesslog = None
+    config.loglevel = 'WARNING'
+    config.h2_max_concurrent_streams = 1000
+    asyncio.run(hypercorn_serve(make_asgi_app(rows, latency), config))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Имитация API school.mos.ru')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rows', type=int, default=100, help='размер списков в ответах')
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа в секундах')
+    parser.add_argument('--http2', action='store_true', help='HTTP/2 без TLS (нужен пакет hypercorn)')
+    options = parser.parse_args()
+    serve(options.host, options.port, options.rows, options.latency, options.http2)
@@ -0,0 +1,69 @@
+"""
+
+Скорость разбора ответов API: модели pydantic и лёгкие записи (Client(records=True)).
+Запуск: python benchmarks/parsing.py [число строк]
+
+"""
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+
+import aiomes
+
+
+class OfflineClient(aiomes.Client):
+    """
+    Клиент без сети: make_request возвращает заранее подготовленный ответ
+
+    """
+
+    async def __ainit__(self, payload, records=False):
+        self.user_id = 1
+        self.records = records
+        self.hooks = []
+        self.storage = None
+        self.payload = payload
+
+    async def make_request(self, method, **query_options):
+        return self.payload
+
+
+def marks_payload(rows):
+    start = date(2024, 9, 1)
+    return {'payload': [
+        {'subject_name': f'Предмет {i % 15}', 'date': str(start + timedelta(i % 120)), 'value': str(2 + i % 4),
+         'weight': 1 + i % 3, 'control_form_name': 'Контрольная работа'}
+        for i in range(rows)
+    ]}
+
+
+def notifications_payload(rows):
+    return [
+        {'datetime': f'2024-10-{1 + i % 28:02d} 12:{i % 60:02d}:00.000', 'event_type': 'create_mark',
+         'subject_name': f'Предмет {i % 15}', 'new_mark_value': '5', 'new_mark_weight': 2}
+        for i in range(rows)
+    ]
+
+
+async def measure(payload, method, records, rounds=5):
+    client = await OfflineClient(payload, records=records)
+    rows = len(payload['payload'] if isinstance(payload, dict) else payload)
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await getattr(client, method)()
+        best = min(best, time.perf_counter() - started)
+    return rows / best
+
+
+async def main(rows):
+    for method, payload in (('get_marks', marks_payload(rows)), ('get_notifications', notifications_payload(rows))):
+        models = await measure(payload, method, records=False)
+        records = await measure(payload, method, records=True)
+        print(f'{method:<20} models: {models:>10,.0f} rows/s   '
+              f'records: {records:>10,.0f} rows/s   x{records / models:.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,200 @@
+"""
+
+Замеры Client на локальной имитации API (benchmarks/mock_server.py), без доступа к сети.
+Сценарии:
+- single - один клиент, concurrency одновременных вызовов разных методов
+- many - clients клиентов с общим Transport, каждый выполняет те же вызовы
+- bulk - разбор больших ответов: оценки и Д/З за учебный год по bulk_rows записей
+
+Для каждого сценария выводятся запросы в секунду, задержка p50 / p99 и пик памяти (tracemalloc).
+С --http2 клиенты используют HTTP2Transport, а имитация работает по HTTP/2 (нужны httpx[http2] и hypercorn).
+Запуск: python benchmarks/run.py [--http2] [--save baseline.json] [--compare baseline.json --tolerance 0.2]
+С --compare код возврата 1, если пропускная способность упала или p99 выросла больше чем на tolerance
+
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import socket
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import aiomes
+from mock_server import serve, profile
+
+START = date(2024, 9, 2)
+CALLS = (
+    lambda client, i: client.get_marks(START + timedelta(i % 200), START + timedelta(i % 200 + 7)),
+    lambda client, i: client.get_homeworks(START + timedelta(i % 200), START + timedelta(i % 200 + 7)),
+    lambda client, i: client.get_schedule(START + timedelta(i % 200)),
+    lambda client, i: client.get_visits(START + timedelta(i % 200), START + timedelta(i % 200 + 7)),
+    lambda client, i: client.get_class_rank(START + timedelta(i % 200), START + timedelta(i % 200 + 7))
+)
+
+
+async def timed(call, latencies):
+    started = time.perf_counter()
+    await call
+    latencies.append(time.perf_counter() - started)
+
+
+async def workload(clients, calls, concurrency, latencies):
+    """
+    calls вызовов на каждого клиента, не более concurrency одновременно на клиента.
+    Параметры вызовов различаются, чтобы запросы не объединялись SingleFlight
+
+    """
+    async def run(client):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                await timed(CALLS[i % len(CALLS)](client, i), latencies)
+
+        await asyncio.gather(*(one(i) for i in range(calls)))
+
+    await asyncio.gather(*(run(client) for client in clients))
+
+
+async def bulk(clients, calls, concurrency, latencies):
+    client = clients[0]
+    end = START + timedelta(270)
+    for _ in range(calls):
+        await timed(client.get_marks(START, end), latencies)
+        await timed(client.get_homeworks(START, end), latencies)
+
+
+def make_transport(base_url, http2=False) -> aiomes.BaseTransport:
+    if http2:
+        return aiomes.HTTP2Transport(http1=False, base_url=base_url)
+    return aiomes.Transport(base_url=base_url)
+
+
+async def scenario(base_url, name, run, clients=1, calls=500, concurrency=10, memory=False, records=False,
+                   http2=False):
+    transport = make_transport(base_url, http2)
+    child = profile(None, 0)['children'][0]
+    snapshot = aiomes.parse_child_profile(child)
+    members = [await aiomes.Client(f'token-{i}', transport=transport, profile=snapshot, records=records)
+               for i in range(clients)]
+    latencies = []
+    try:
+        await run(members, 1, concurrency, [])
+        if memory:
+            tracemalloc.start()
+            await run(members, calls, concurrency, latencies)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return {'peak_memory_mb': round(peak / 2 ** 20, 2)}
+
+        started = time.perf_counter()
+        await run(members, calls, concurrency, latencies)
+        elapsed = time.perf_counter() - started
+    finally:
+        await transport.close()
+
+    latencies.sort()
+    return {
+        'scenario': name,
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p99_ms': round(latencies[math.ceil(len(latencies) * 0.99) - 1] * 1000, 3)
+    }
+
+
+def start_server(rows, latency, http2=False):
+    """
+    Имитация API в отдельном процессе, чтобы она не делила процессор с клиентом
+
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=serve, args=('127.0.0.1', port, rows, latency, http2),
+                                      daemon=True)
+    process.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return process, f'http://127.0.0.1:{port}/api/'
+
+
+async def main(options):
+    http2 = options.http2
+    scenarios = {
+        'single': dict(run=workload, clients=1, calls=options.calls, concurrency=options.concurrency, http2=http2),
+        'many': dict(run=workload, clients=options.clients, calls=max(1, options.calls // options.clients),
+                     concurrency=options.concurrency, http2=http2),
+        'bulk': dict(run=bulk, clients=1, calls=options.bulk_calls, concurrency=1, records=options.records,
+                     http2=http2)
+    }
+    results = {}
+    for name in options.scenarios:
+        rows = options.bulk_rows if name == 'bulk' else options.rows
+        server, base_url = start_server(rows, options.latency, http2)
+        try:
+            result = await scenario(base_url, name, **scenarios[name])
+            result.update(await scenario(base_url, name, **scenarios[name], memory=True))
+        finally:
+            server.terminate()
+            server.join()
+        results[name] = result
+        print(f'{name:<8} {result["requests"]:>7} req {result["rps"]:>10,.1f} req/s   '
+              f'p50 {result["p50_ms"]:>8.2f} ms   p99 {result["p99_ms"]:>8.2f} ms   '
+              f'peak {result["peak_memory_mb"]:>8.2f} MB')
+    return results
+
+
+def compare(results, baseline, tolerance) -> list:
+    """
+    Ухудшения относительно сохранённых результатов больше чем на tolerance (доля)
+
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f'{name}: rps {base["rps"]} -> {result["rps"]}')
+        if result['p99_ms'] > base['p99_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: p99 {base["p99_ms"]} ms -> {result["p99_ms"]} ms')
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замеры aiomes на имитации API')
+    parser.add_argument('scenarios', nargs='*', default=['single', 'many', 'bulk'], help='single, many, bulk')
+    parser.add_argument('--calls', type=int, default=2000, help='число вызовов в сценариях single и many')
+    parser.add_argument('--clients', type=int, default=100, help='число клиентов в сценарии many')
+    parser.add_argument('--concurrency', type=int, default=10, help='одновременных вызовов на клиента')
+    parser.add_argument('--rows', type=int, default=50, help='размер списков в ответах')
+    parser.add_argument('--bulk-rows', type=int, default=50_000, help='размер списков в сценарии bulk')
+    parser.add_argument('--bulk-calls', type=int, default=3, help='повторов в сценарии bulk')
+    parser.add_argument('--records', action='store_true', help='bulk с Client(records=True)')
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа имитации в секундах')
+    parser.add_argument('--http2', action='store_true', help='HTTP2Transport и имитация по HTTP/2')
+    parser.add_argument('--save', help='сохранить результаты в JSON')
+    parser.add_argument('--compare', help='сравнить с сохранёнными результатами')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='допустимое ухудшение (доля)')
+    options = parser.parse_args()
+
+    results = asyncio.run(main(options))
+    if options.save:
+        with open(options.save, 'w') as file:
+            json.dump(results, file, indent=2)
+    if options.compare:
+        with open(options.compare) as file:
+            regressions = compare(results, json.load(file), options.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        sys.exit(1 if regressions else 0)
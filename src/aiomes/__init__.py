@@ -4,4 +4,19 @@ aiomes v. 1.5.1
 
 """
 from .main import *
+from .analytics import *
+from .blocking import *
+from .cache import *
+from .export import *
+from .metrics import *
+from .pool import *
+from .shared import *
+from .singleflight import *
+from .storage import *
+from .sync import *
+from .throttle import *
+from .timetable import *
+from .tokens import *
+from .transport import *
 from .user_auth import *
+from .watch import *
@@ -0,0 +1,263 @@
+from datetime import date
+from typing import NamedTuple, Iterable, Dict, List, Any
+from .output_types import *
+from .utils import MARK_WEIGHTS_SYMBOLS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Ordinal 1970-01-01: даты хранятся числом дней от эпохи, как datetime64[D]
+EPOCH = date(1970, 1, 1).toordinal()
+WEIGHTS_BY_SYMBOL = {symbol: weight for weight, symbol in MARK_WEIGHTS_SYMBOLS.items()}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('Для MarksFrame нужен пакет numpy')
+
+
+class GroupStats(NamedTuple):
+    """
+    Результат расчёта по группам в виде колонок: students[i], subjects[i] -> values[i].
+    subjects - None, если расчёт выполнялся только по учащимся
+
+    """
+    students: Any
+    subjects: Any
+    values: Any
+
+    def to_dict(self) -> Dict[Any, float]:
+        """
+        Словарь {(student, subject): value} или {student: value}
+
+        """
+        if self.subjects is None:
+            return dict(zip(self.students.tolist(), self.values.tolist()))
+        return dict(zip(zip(self.students.tolist(), self.subjects.tolist()), self.values.tolist()))
+
+
+def split_mark(mark: str) -> tuple:
+    """
+    Оценка с весом в виде строки ('5²', как в get_period_marks и get_schedule) -> ('5', 2)
+
+    """
+    weight = WEIGHTS_BY_SYMBOL.get(mark[-1:])
+    return (mark[:-1], weight) if weight is not None else (mark, 1)
+
+
+class MarksFrame:
+    """
+    Оценки множества учащихся в колонках numpy (нужен пакет numpy):
+    values (float, NaN для нечисловых оценок), weights, subjects (коды в subject_names), days (datetime64[D]), students.
+    Средние, динамика и прогнозы считаются сразу для всех учащихся и предметов без циклов Python
+
+    """
+
+    def __init__(self, values, weights, subjects, days, students, subject_names: List[str]):
+        _require_numpy()
+        self.values = np.asarray(values, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.subjects = np.asarray(subjects, dtype=np.int32)
+        self.days = np.asarray(days, dtype='datetime64[D]')
+        self.students = np.asarray(students, dtype=np.int64)
+        self.subject_names = list(subject_names)
+
+    @classmethod
+    def from_marks(cls, marks: Iterable, student=0) -> 'MarksFrame':
+        """
+        Из результатов get_marks / iter_marks (BaseMarkType или MarkRecord)
+        :param student: Идентификатор учащегося (например, user.user_id)
+
+        """
+        builder = _Builder()
+        builder.add_marks(marks, student)
+        return builder.frame(cls)
+
+    @classmethod
+    def from_results(cls, results) -> 'MarksFrame':
+        """
+        Из оценок множества учащихся: {user_id: marks} (get_children_marks) или
+        список PoolResult (ClientPool.get_marks). Результаты с ошибками пропускаются
+
+        """
+        builder = _Builder()
+        items = results.items() if isinstance(results, dict) else (
+            (result.client.user_id, result.result) for result in results if result.error is None)
+        for student, marks in items:
+            builder.add_marks(marks, student)
+        return builder.frame(cls)
+
+    @classmethod
+    def from_period_marks(cls, period_marks: List[TrimesterMarksType], student=0) -> 'MarksFrame':
+        """
+        Из get_period_marks: строки вида '5²' разбираются один раз. Дат у оценок периода нет (NaT)
+
+        """
+        builder = _Builder()
+        for subject in period_marks or ():
+            for mark in subject.marks:
+                value, weight = split_mark(mark)
+                builder.add(value, weight, subject.subject_name, None, student)
+        return builder.frame(cls)
+
+    @classmethod
+    def concat(cls, frames: Iterable['MarksFrame']) -> 'MarksFrame':
+        _require_numpy()
+        frames = list(frames)
+        names = list(dict.fromkeys(name for frame in frames for name in frame.subject_names))
+        index = {name: code for code, name in enumerate(names)}
+        return cls(
+            np.concatenate([frame.values for frame in frames]),
+            np.concatenate([frame.weights for frame in frames]),
+            np.concatenate([np.array([index[name] for name in frame.subject_names], dtype=np.int32)[frame.subjects]
+                            for frame in frames]),
+            np.concatenate([frame.days for frame in frames]),
+            np.concatenate([frame.students for frame in frames]),
+            names
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    def select(self, students=None, subjects=None, from_date=None, to_date=None) -> 'MarksFrame':
+        """
+        Подмножество оценок
+        :param students: Идентификаторы учащихся
+        :param subjects: Названия предметов
+        :param from_date: Дата начала (включительно)
+        :param to_date: Дата окончания (включительно)
+
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if students is not None:
+            mask &= np.isin(self.students, list(students))
+        if subjects is not None:
+            codes = [code for code, name in enumerate(self.subject_names) if name in set(subjects)]
+            mask &= np.isin(self.subjects, codes)
+        if from_date is not None:
+            mask &= self.days >= np.datetime64(from_date, 'D')
+        if to_date is not None:
+            mask &= self.days <= np.datetime64(to_date, 'D')
+        return MarksFrame(self.values[mask], self.weights[mask], self.subjects[mask], self.days[mask],
+                          self.students[mask], self.subject_names)
+
+    def _groups(self, by_subject, dated=False):
+        """
+        Номер группы (учащийся или учащийся + предмет) для каждой числовой оценки
+        :param dated: Учитывать только оценки с датой
+
+        """
+        valid = ~np.isnan(self.values)
+        if dated:
+            valid &= ~np.isnat(self.days)
+        key = self.students[valid]
+        if by_subject:
+            key = key * len(self.subject_names) + self.subjects[valid]
+        keys, group = np.unique(key, return_inverse=True)
+        return valid, keys, group
+
+    def _stats(self, keys, by_subject, values) -> GroupStats:
+        if not by_subject:
+            return GroupStats(keys, None, values)
+        count = len(self.subject_names)
+        names = np.array(self.subject_names, dtype=object)
+        return GroupStats(keys // count, names[keys % count], values)
+
+    def _sums(self, by_subject):
+        valid, keys, group = self._groups(by_subject)
+        weights = self.weights[valid]
+        total_weight = np.bincount(group, weights=weights, minlength=len(keys))
+        total = np.bincount(group, weights=self.values[valid] * weights, minlength=len(keys))
+        return keys, total, total_weight
+
+    def averages(self, by_subject=True) -> GroupStats:
+        """
+        Средневзвешенные оценки по учащимся и предметам (by_subject=False - по учащимся в целом)
+
+        """
+        keys, total, total_weight = self._sums(by_subject)
+        return self._stats(keys, by_subject, total / total_weight)
+
+    def trends(self, by_subject=True, period_days=30) -> GroupStats:
+        """
+        Динамика: наклон взвешенной линейной регрессии оценки по дате - изменение оценки за period_days дней.
+        Оценки без даты не учитываются; группы, где все оценки выставлены в один день, получают NaN
+
+        """
+        valid, keys, group = self._groups(by_subject, dated=True)
+        days = self.days[valid].astype(np.int64).astype(np.float64)
+        days -= days.mean() if len(days) else 0
+        weights, values = self.weights[valid], self.values[valid]
+
+        def total(column):
+            return np.bincount(group, weights=column, minlength=len(keys))
+
+        w, wx, wy = total(weights), total(weights * days), total(weights * values)
+        wxx, wxy = total(weights * days * days), total(weights * days * values)
+        denominator = w * wxx - wx * wx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(np.abs(denominator) > 1e-9, (w * wxy - wx * wy) / denominator, np.nan)
+        return self._stats(keys, by_subject, slope * period_days)
+
+    def what_if(self, value, weight=1, count=1, by_subject=True) -> GroupStats:
+        """
+        Средние после получения ещё count оценок value с весом weight в каждой группе
+
+        """
+        keys, total, total_weight = self._sums(by_subject)
+        added = weight * count
+        return self._stats(keys, by_subject, (total + value * added) / (total_weight + added))
+
+    def needed(self, target, value=5, weight=1, by_subject=True) -> GroupStats:
+        """
+        Сколько оценок value с весом weight нужно получить, чтобы среднее достигло target.
+        0 - цель уже достигнута, NaN - недостижима такими оценками
+
+        """
+        keys, total, total_weight = self._sums(by_subject)
+        current = total / total_weight
+        with np.errstate(divide='ignore', invalid='ignore'):
+            count = np.ceil((target * total_weight - total) / (weight * (value - target)) - 1e-9)
+        count = np.where(current >= target, 0, np.where(value > target, count, np.nan))
+        return self._stats(keys, by_subject, count)
+
+
+class _Builder:
+    """
+    Накопление колонок с кэшированием разбора значений и кодов предметов
+
+    """
+
+    def __init__(self):
+        _require_numpy()
+        self.values, self.weights, self.subjects, self.days, self.students = [], [], [], [], []
+        self.subject_codes: Dict[str, int] = {}
+        self.parsed: Dict[str, float] = {}
+
+    def add_marks(self, marks, student):
+        for mark in marks or ():
+            self.add(mark.value, mark.weight, mark.subject_name, mark.mark_date.toordinal() - EPOCH, student)
+
+    def add(self, value, weight, subject, day, student):
+        number = self.parsed.get(value)
+        if number is None:
+            try:
+                number = float(str(value).replace(',', '.'))
+            except ValueError:
+                number = float('nan')
+            self.parsed[value] = number
+        code = self.subject_codes.get(subject)
+        if code is None:
+            code = self.subject_codes[subject] = len(self.subject_codes)
+
+        self.values.append(number)
+        self.weights.append(weight)
+        self.subjects.append(code)
+        self.days.append(-2 ** 63 if day is None else day)
+        self.students.append(student)
+
+    def frame(self, cls) -> MarksFrame:
+        return cls(self.values, self.weights, self.subjects, np.array(self.days, dtype=np.int64).view('datetime64[D]'),
+                   self.students, list(self.subject_codes))
@@ -0,0 +1,280 @@
+import asyncio
+import atexit
+import functools
+import inspect
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, NamedTuple, Any, Iterator
+from .main import Client
+from .pool import ClientPool
+from .transport import Transport, BaseTransport
+from .user_auth import AuthPool
+
+
+class EventLoopThread:
+    """
+    Event loop в отдельном потоке для синхронного кода. Корутины выполняются в нём через run(),
+    поэтому loop и пул соединений создаются один раз, а не на каждый asyncio.run
+
+    """
+
+    def __init__(self, transport: BaseTransport = None, name='aiomes-loop'):
+        """
+        :param transport: Общий пул соединений клиентов этого потока. По умолчанию - Transport()
+        :param name: Имя потока
+
+        """
+        self.transport = transport or Transport()
+        self.loop = asyncio.new_event_loop()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def _run_forever(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coroutine, timeout: float = None):
+        """
+        Выполнение корутины в потоке loop с ожиданием результата
+        :param timeout: Время ожидания в секундах. None - без ограничения
+
+        """
+        if self._closed:
+            coroutine.close()
+            raise RuntimeError('EventLoopThread закрыт')
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def call(self, function, *args, **kwargs):
+        """
+        Вызов функции внутри loop. Если она вернула awaitable, дожидается результата
+
+        """
+        async def call():
+            result = function(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        return self.run(call())
+
+    def iterate(self, iterator) -> Iterator:
+        """
+        Синхронный обход асинхронного итератора: каждый элемент запрашивается в потоке loop
+
+        """
+        async def step():
+            return await iterator.__anext__()
+
+        try:
+            while True:
+                try:
+                    yield self.run(step())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if hasattr(iterator, 'aclose') and not self._closed:
+                self.run(iterator.aclose())
+
+    def close(self):
+        """
+        Закрытие пула соединений и остановка потока
+
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self.run(self.transport.close())
+            self._closed = True
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_default_loop = None
+_default_lock = threading.Lock()
+
+
+def default_loop() -> EventLoopThread:
+    """
+    Общий для всех синхронных клиентов процесса поток с event loop и пулом соединений.
+    Создаётся при первом обращении и закрывается при выходе из интерпретатора
+
+    """
+    global _default_loop
+    with _default_lock:
+        if _default_loop is None or _default_loop._closed:
+            _default_loop = EventLoopThread()
+            atexit.register(_default_loop.close)
+        return _default_loop
+
+
+class SyncProxy:
+    """
+    Синхронная обёртка асинхронного объекта: корутинные методы выполняются в EventLoopThread
+    и возвращают результат, асинхронные итераторы (iter_*, watch_notifications) становятся обычными
+
+    """
+
+    def __init__(self, target, loop: EventLoopThread):
+        self._target = target
+        self._loop = loop
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        value = getattr(self._target, name)
+        if not callable(value):
+            return value
+
+        @functools.wraps(value)
+        def method(*args, **kwargs):
+            result = self._loop.call(value, *args, **kwargs)
+            if hasattr(result, '__anext__'):
+                return self._loop.iterate(result)
+            return result
+        return method
+
+    def close(self):
+        self._loop.call(self._target.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SyncClient(SyncProxy):
+    """
+    Синхронный Client для кода без asyncio: user = SyncClient(token); marks = user.get_marks(...).
+    Все клиенты используют общий поток default_loop() и его пул соединений
+
+    """
+
+    def __init__(self, token=None, loop: EventLoopThread = None, **client_options):
+        """
+        :param token: Токен учащегося
+        :param loop: Поток с event loop. По умолчанию - default_loop()
+        :param client_options: Параметры Client. transport по умолчанию - пул соединений loop
+
+        """
+        loop = loop or default_loop()
+        client_options.setdefault('transport', loop.transport)
+        super().__init__(loop.call(Client, token, **client_options), loop)
+
+
+class SyncAuthPool(SyncProxy):
+    """
+    Синхронный AuthPool: собственный async_playwright запускается в потоке loop
+
+    """
+
+    def __init__(self, browsers=2, concurrency=8, loop: EventLoopThread = None, **launch_options):
+        """
+        :param browsers: Количество запущенных браузеров
+        :param concurrency: Максимальное число одновременных входов
+        :param loop: Поток с event loop. По умолчанию - default_loop()
+        :param launch_options: Параметры запуска firefox
+
+        """
+        loop = loop or default_loop()
+
+        async def start():
+            from playwright.async_api import async_playwright
+            playwright = await async_playwright().start()
+            try:
+                return playwright, await AuthPool(playwright, browsers, concurrency, **launch_options)
+            except BaseException:
+                await playwright.stop()
+                raise
+
+        self._playwright, pool = loop.run(start())
+        super().__init__(pool, loop)
+
+    def obtain_token(self, login, password, get_2fa_code=None):
+        """
+        :param get_2fa_code: Обычная функция без аргументов, возвращающая 2FA-код. Вызывается в пуле потоков
+        :return: str
+
+        """
+        async def code():
+            return await asyncio.get_running_loop().run_in_executor(None, get_2fa_code)
+
+        return self._loop.call(self._target.obtain_token, login, password,
+                               code if get_2fa_code is not None else None)
+
+    def close(self):
+        super().close()
+        self._loop.call(self._playwright.stop)
+
+
+class ShardedResult(NamedTuple):
+    results: Dict[str, Any]
+    failed: Dict[str, BaseException]
+    profiles: Dict[str, dict]
+
+
+def run_sharded(tokens, method, args=(), kwargs: dict = None, processes: int = None,
+                profiles: Dict[str, dict] = None, transport_factory=None, **pool_options) -> ShardedResult:
+    """
+    Вызов метода для множества учащихся в нескольких процессах: токены делятся между процессами,
+    каждый выполняет свою часть в собственном event loop и ClientPool, результаты объединяются.
+    Результаты и ошибки передаются между процессами через pickle
+    :param tokens: Токены учащихся
+    :param method: Название метода Client ('get_marks') или корутинная функция уровня модуля method(client, ...)
+    :param args: Позиционные аргументы метода
+    :param kwargs: Именованные аргументы метода
+    :param processes: Число процессов. По умолчанию - число процессоров
+    :param profiles: Сохранённые профили по токенам (ShardedResult.profiles). Для них профиль не запрашивается
+    :param transport_factory: Функция без аргументов, создающая пул соединений процесса, например
+                              functools.partial(Transport, base_url=...). По умолчанию - собственный пул ClientPool
+    :param pool_options: Параметры ClientPool каждого процесса (concurrency, token_rate, records, ...)
+    :return: ShardedResult: результаты и ошибки по токенам, профили для следующего запуска
+
+    """
+    tokens = list(dict.fromkeys(tokens))
+    if not tokens:
+        return ShardedResult({}, {}, {})
+    processes = min(processes or os.cpu_count() or 1, len(tokens))
+    profiles = profiles or {}
+
+    merged = ShardedResult({}, {}, {})
+    with ProcessPoolExecutor(processes) as executor:
+        futures = []
+        for index in range(processes):
+            shard = tokens[index::processes]
+            futures.append(executor.submit(_run_shard, shard, method, tuple(args), kwargs or {},
+                                           {token: profiles[token] for token in shard if token in profiles},
+                                           transport_factory, pool_options))
+        for future in futures:
+            for total, part in zip(merged, future.result()):
+                total.update(part)
+    return merged
+
+
+def _run_shard(tokens, method, args, kwargs, profiles, transport_factory, pool_options) -> ShardedResult:
+    return asyncio.run(_shard(tokens, method, args, kwargs, profiles, transport_factory, pool_options))
+
+
+async def _shard(tokens, method, args, kwargs, profiles, transport_factory, pool_options) -> ShardedResult:
+    transport = transport_factory() if transport_factory is not None else None
+    try:
+        async with await ClientPool(tokens, transport=transport, profiles=profiles, **pool_options) as pool:
+            result = ShardedResult({}, dict(pool.failed), pool.snapshot())
+            async for client, value, error in pool.map(method, *args, **kwargs):
+                if error is None:
+                    result.results[client.token] = value
+                else:
+                    result.failed[client.token] = error
+            return result
+    finally:
+        if transport is not None:
+            await transport.close()
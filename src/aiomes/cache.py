@@ -0,0 +1,206 @@
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Dict
+from .database import SQLiteDatabase
+
+
+DAY = 24 * 60 * 60
+
+DEFAULT_TTLS = {
+    'family/web/v1/school_info': DAY,
+    'ej/core/family/v1/periods_schedules': DAY,
+    'family/web/v1/subjects/list': DAY,
+    'ej/core/family/v1/final_marks_prev_year': DAY,
+    'family/web/v1/menu': 60 * 60,
+    'family/web/v1/menu/buffet': 60 * 60,
+}
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    expires: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """
+        Заголовки условного запроса для проверки устаревшей записи
+
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class BaseCache:
+    """
+    Интерфейс хранилища кэша. Записи вытесняются по принципу LRU, когда суммарный размер тел ответов
+    превышает max_size
+
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024):
+        """
+        :param max_size: Максимальный суммарный размер хранимых ответов в байтах
+
+        """
+        self.max_size = max_size
+
+    async def get(self, key) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    async def set(self, key, entry: CacheEntry):
+        raise NotImplementedError
+
+    async def delete(self, key):
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryCache(BaseCache):
+    """
+    Кэш в памяти процесса
+
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024):
+        super().__init__(max_size)
+        self.size = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    async def get(self, key) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key, entry: CacheEntry):
+        await self.delete(key)
+        if len(entry.body) > self.max_size:
+            return
+
+        self._entries[key] = entry
+        self.size += len(entry.body)
+        while self.size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.body)
+
+    async def delete(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+
+    async def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(SQLiteDatabase, BaseCache):
+    """
+    Кэш на диске в базе SQLite. Переживает перезапуск процесса и может использоваться несколькими процессами
+
+    """
+
+    def __init__(self, path='aiomes_cache.sqlite', max_size=256 * 1024 * 1024):
+        """
+        :param path: Путь к файлу базы
+        :param max_size: Максимальный суммарный размер хранимых ответов в байтах
+
+        """
+        BaseCache.__init__(self, max_size)
+        SQLiteDatabase.__init__(self, path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                         'key TEXT PRIMARY KEY, body BLOB, expires REAL, etag TEXT, last_modified TEXT, '
+                         'size INTEGER, accessed REAL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+
+    def _get(self, key):
+        row = self._db.execute('SELECT body, expires, etag, last_modified FROM responses WHERE key = ?',
+                               (key,)).fetchone()
+        if row is not None:
+            self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (time.time(), key))
+            return CacheEntry(*row)
+
+    def _set(self, key, entry):
+        self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (key, entry.body, entry.expires, entry.etag, entry.last_modified,
+                          len(entry.body), time.time()))
+        self._db.execute('DELETE FROM responses WHERE key IN ('
+                         'SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed DESC) AS total '
+                         'FROM responses) WHERE total > ?)', (self.max_size,))
+
+    async def get(self, key) -> Optional[CacheEntry]:
+        return await self._execute(self._get, key)
+
+    async def set(self, key, entry: CacheEntry):
+        await self._execute(self._set, key, entry)
+
+    async def delete(self, key):
+        await self._execute(self._db.execute, 'DELETE FROM responses WHERE key = ?', (key,))
+
+    async def clear(self):
+        await self._execute(self._db.execute, 'DELETE FROM responses')
+
+
+class ResponseCache:
+    """
+    Политика кэширования ответов API: какие методы кэшировать и на какое время.
+    Один экземпляр можно передать в несколько Client — ключ записи указывает учащегося
+    (student_id, contract_id, ...), а не токен, поэтому записи остаются действительными после повторного входа
+
+    """
+
+    def __init__(self, backend: BaseCache = None, ttls: Dict[str, float] = None):
+        """
+        :param backend: Хранилище записей. По умолчанию - MemoryCache
+        :param ttls: Время жизни ответа в секундах для каждого API-endpoint. По умолчанию - DEFAULT_TTLS
+
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+
+    def ttl(self, method) -> Optional[float]:
+        return self.ttls.get(method.split('?')[0])
+
+    async def get(self, key) -> Optional[CacheEntry]:
+        return await self.backend.get(key)
+
+    async def store(self, key, method, body: bytes, headers):
+        """
+        Сохранение ответа вместе с валидаторами ETag / Last-Modified
+
+        """
+        await self.backend.set(key, CacheEntry(
+            body=body,
+            expires=time.time() + self.ttl(method),
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified')
+        ))
+
+    async def revalidate(self, key, method, entry: CacheEntry) -> CacheEntry:
+        """
+        Продление записи после ответа 304 Not Modified
+
+        """
+        entry = entry._replace(expires=time.time() + self.ttl(method))
+        await self.backend.set(key, entry)
+        return entry
+
+    async def close(self):
+        await self.backend.close()
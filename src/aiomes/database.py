@@ -0,0 +1,27 @@
+import asyncio
+import sqlite3
+
+
+class SQLiteDatabase:
+    """
+    Соединение SQLite для асинхронного кода (журнал WAL). Запросы выполняются в пуле потоков
+    по одному, чтобы не блокировать event loop
+
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Путь к файлу базы. ':memory:' - база в памяти
+
+        """
+        self.path = path
+        self._lock = asyncio.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+
+    async def _execute(self, func, *args):
+        async with self._lock:
+            return await asyncio.to_thread(func, *args)
+
+    async def close(self):
+        await self._execute(self._db.close)
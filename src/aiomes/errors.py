@@ -17,11 +17,41 @@ class Invalid2FACode(ErrorHandler):
         super().__init__(message)
 
 
+class TwoFactorRequiredError(ErrorHandler):
+    def __init__(self, message: str = "Для входа нужен 2FA код"):
+        super().__init__(message)
+
+
+class TokenRefreshError(ErrorHandler):
+    def __init__(self, message: str = "Функция обновления вернула не токен"):
+        super().__init__(message)
+
+
 class RequestError(ErrorHandler):
     def __init__(self, error_code, message: str = "Ошибка запроса"):
         self.error_code = error_code
+        self._description = message
         super().__init__(f'{message} ({error_code})')
 
+    def __reduce__(self):
+        # Передача между процессами (run_sharded): по умолчанию pickle сохранил бы только итоговое сообщение
+        return self.__class__, (self.error_code, self._description)
+
+
+class TransportError(ErrorHandler):
+    def __init__(self, message: str = "Ошибка соединения"):
+        super().__init__(message)
+
+
+class RequestTimeoutError(TransportError):
+    def __init__(self, message: str = "Превышено время ожидания ответа"):
+        super().__init__(message)
+
+
+class CircuitOpenError(ErrorHandler):
+    def __init__(self, message: str = "Сервис временно недоступен, запросы приостановлены"):
+        super().__init__(message)
+
 
 class UnknownError(ErrorHandler):
     def __init__(self, message: str = "Неизвестная ошибка!"):
@@ -0,0 +1,189 @@
+import asyncio
+import csv
+import json
+import typing
+from datetime import date, datetime
+from typing import AsyncIterable, NamedTuple, Dict, List, Optional
+from .pool import PoolResult
+
+try:
+    import orjson
+
+    def _dumps(row) -> bytes:
+        return orjson.dumps(row, default=_default, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    def _dumps(row) -> bytes:
+        return json.dumps(row, ensure_ascii=False, default=_default).encode() + b'\n'
+
+
+class ExportResult(NamedTuple):
+    rows: int
+    errors: Dict[int, BaseException]
+
+
+class BaseWriter:
+    """
+    Запись пачек строк (список словарей) в файл. Методы вызываются в отдельном потоке
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, rows: List[dict], types: Dict[str, type]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class NDJSONWriter(BaseWriter):
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'wb')
+
+    def write(self, rows, types):
+        self._file.write(b''.join(_dumps(row) for row in rows))
+
+    def close(self):
+        self._file.close()
+
+
+class CSVWriter(BaseWriter):
+    """
+    CSV с заголовком. Даты - в формате ISO, списки - в виде JSON
+
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = None
+
+    def write(self, rows, types):
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(rows[0]))
+            self._writer.writeheader()
+        self._writer.writerows({
+            name: json.dumps(value, ensure_ascii=False, default=_default) if isinstance(value, (list, tuple, dict))
+            else _default(value) if isinstance(value, date) else value
+            for name, value in row.items()
+        } for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter(BaseWriter):
+    """
+    Parquet (нужен пакет pyarrow). Каждая пачка записывается отдельной группой строк.
+    Схема строится по аннотациям модели / записи, поэтому пустые в первой пачке поля получают верный тип
+
+    """
+
+    def __init__(self, path, compression='zstd'):
+        import pyarrow
+        import pyarrow.parquet
+        super().__init__(path)
+        self._pa = pyarrow
+        self._parquet = pyarrow.parquet
+        self.compression = compression
+        self._writer = None
+
+    def _type(self, annotation):
+        pa = self._pa
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+            return self._type(args[0])
+        if typing.get_origin(annotation) in (list, tuple) or annotation in (list, tuple):
+            return pa.list_(self._type(args[0]) if args else pa.string())
+        return {str: pa.string(), int: pa.int64(), float: pa.float64(), bool: pa.bool_(),
+                datetime: pa.timestamp('us'), date: pa.date32()}.get(annotation, pa.string())
+
+    def write(self, rows, types):
+        if self._writer is None:
+            schema = self._pa.schema([(name, self._type(types.get(name, str))) for name in rows[0]])
+            self._writer = self._parquet.ParquetWriter(self.path, schema, compression=self.compression)
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+WRITERS = {
+    'ndjson': NDJSONWriter,
+    'jsonl': NDJSONWriter,
+    'csv': CSVWriter,
+    'parquet': ParquetWriter
+}
+
+
+async def export(items: AsyncIterable, path, format: str = None, batch_size=10_000,
+                 student_field: Optional[str] = 'student_id') -> ExportResult:
+    """
+    Потоковая выгрузка записей в файл NDJSON / CSV / Parquet пачками по batch_size строк.
+    Запись файла идёт в отдельном потоке параллельно с получением следующей пачки,
+    поэтому в памяти не более двух пачек независимо от объёма выгрузки
+    :param items: Асинхронный поток моделей или записей (user.iter_marks(...)) либо PoolResult (pool.stream(...))
+    :param path: Путь к файлу
+    :param format: 'ndjson', 'csv' или 'parquet'. По умолчанию - по расширению файла
+    :param batch_size: Количество строк в одной пачке
+    :param student_field: Колонка с user_id учащегося для PoolResult. None - не добавлять
+    :return: Количество записанных строк и ошибки учащихся по user_id
+
+    """
+    format = (format or str(path).rsplit('.', 1)[-1]).lower()
+    if format not in WRITERS:
+        raise ValueError(f'Неизвестный формат выгрузки: {format}')
+    writer = WRITERS[format](path)
+
+    count, errors, batch, types = 0, {}, [], None
+    pending = None
+    try:
+        async for item in items:
+            student = None
+            if isinstance(item, PoolResult):
+                student = item.client.user_id
+                if item.error is not None:
+                    errors[student] = item.error
+                    continue
+                item = item.result
+
+            if types is None:
+                types = dict(typing.get_type_hints(type(item)))
+                if student_field is not None and student is not None:
+                    types[student_field] = int
+            row = item._asdict() if isinstance(item, tuple) else dict(item)
+            if student_field is not None and student is not None:
+                row[student_field] = student
+            batch.append(row)
+
+            if len(batch) >= batch_size:
+                if pending is not None:
+                    await pending
+                pending = asyncio.ensure_future(asyncio.to_thread(writer.write, batch, types))
+                count += len(batch)
+                batch = []
+
+        if pending is not None:
+            await pending
+        if batch:
+            await asyncio.to_thread(writer.write, batch, types)
+            count += len(batch)
+    finally:
+        if pending is not None and not pending.done():
+            await asyncio.gather(pending, return_exceptions=True)
+        await asyncio.to_thread(writer.close)
+
+    return ExportResult(count, errors)
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    if hasattr(value, '_asdict'):
+        return value._asdict()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
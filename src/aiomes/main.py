@@ -1,10 +1,73 @@
-import aiohttp
-from datetime import date, datetime as dt
+import asyncio
+import hashlib
+import time
+from datetime import date
+from functools import partial
 from async_class import AsyncClass
-from typing import List, Dict
+from typing import List, Dict, AsyncIterator, Any
 from .utils import *
 from .output_types import *
 from .errors import *
+from .transport import *
+from .cache import *
+from .singleflight import *
+from .throttle import *
+from .tokens import *
+from .storage import *
+from .shared import *
+from .metrics import Span, request_time
+
+PROFILE_FIELDS = ('user_id', 'person_id', 'first_name', 'middle_name', 'last_name', 'birth_date', 'class_level',
+                  'class_name', 'class_unit', 'snils', 'phone', 'school_id', 'contract_id', 'parents')
+
+# Части Client.get_overview: название -> вызов для радиуса дат
+OVERVIEW_PARTS = {
+    'schedule': lambda client, from_date, to_date: client.get_schedule_range(from_date, to_date),
+    'homeworks': lambda client, from_date, to_date: client.get_homeworks(from_date, to_date),
+    'marks': lambda client, from_date, to_date: client.get_marks(from_date, to_date),
+    'notifications': lambda client, from_date, to_date: client.get_notifications(),
+    'menu': lambda client, from_date, to_date: client.get_menu(from_date),
+    'visits': lambda client, from_date, to_date: client.get_visits(from_date, to_date)
+}
+
+# Вид данных storage -> метод, загружающий его за радиус дат
+STORED_METHODS = {
+    'marks': 'get_marks',
+    'homeworks': 'get_homeworks',
+    'visits': 'get_visits',
+    'ranks': 'get_class_rank'
+}
+
+HEADERS = {
+    'x-mes-subsystem': 'familyweb',
+    'x-mes-role': 'student',
+    'origin': 'https://dnevnik.mos.ru/',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0'
+}
+
+
+def parse_child_profile(child) -> dict:
+    """
+    Данные ребёнка из ответа family/web/v1/profile в формате Client.snapshot()
+
+    """
+    return {
+        'user_id': child['id'],
+        'person_id': child['contingent_guid'],
+        'first_name': child['first_name'],
+        'middle_name': child.get('middle_name'),
+        'last_name': child['last_name'],
+        'birth_date': child['birth_date'],
+        'class_level': child['class_level_id'],
+        'class_name': child['class_name'],
+        'class_unit': child['class_unit_id'],
+        'snils': child.get('snils'),
+        'phone': child.get('phone'),
+        'school_id': child['school']['id'],
+        'contract_id': child['contract_id'],
+        'parents': [f'{parent.get('first_name')} {parent.get('last_name')}'
+                    for parent in child.get('representatives', [{}])]
+    }
 
 
 class Client(AsyncClass):
@@ -13,31 +76,234 @@ class Client(AsyncClass):
 
     """
 
-    async def __ainit__(self, token):
+    async def __ainit__(self, token=None, transport: BaseTransport = None, cache: ResponseCache = None,
+                        single_flight: SingleFlight = None, retry: RetryPolicy = None, limiter: RateLimiter = None,
+                        records=False, json_loads=None, token_manager: TokenManager = None, account=None,
+                        profile: dict = None, lazy=False, child=0, hooks: list = None, storage: SQLiteStorage = None,
+                        shared: SharedResources = None):
         """
         :param token: Токен учащегося для работы со всеми методами, получаемый через user_auth
+        :param transport: Общий пул соединений. По умолчанию клиент создаёт и закрывает собственный
+        :param cache: Кэш ответов для редко меняющихся методов. По умолчанию не используется
+        :param single_flight: Объединение одновременных одинаковых запросов. Можно разделять между клиентами
+        :param retry: Политика повторов и тайм-аутов. По умолчанию - RetryPolicy()
+        :param limiter: Ограничитель частоты запросов этого учащегося. Общий лимит задаётся в transport
+        :param records: Возвращать оценки, Д/З, посещаемость, рейтинг и уведомления лёгкими записями NamedTuple
+                        (MarkRecord, ...) без проверки pydantic. Ускоряет массовые выгрузки и экономит память.
+                        Методы принимают records и для отдельного вызова
+        :param json_loads: Функция разбора JSON из bytes. По умолчанию - orjson / msgspec, если установлены, иначе json
+        :param token_manager: Менеджер токенов. Если token не указан, он берётся из менеджера; при ответе 401
+                              токен обновляется и запрос повторяется один раз
+        :param account: Идентификатор аккаунта в token_manager
+        :param profile: Сохранённый профиль (Client.snapshot()). Запрос профиля при создании не выполняется
+        :param lazy: Не запрашивать профиль при создании; он загрузится при первом методе, которому нужен
+        :param child: Номер ребёнка в профиле родителя, с которым работают методы. По умолчанию - первый
+        :param hooks: Получатели этапов работы клиента (Span): объекты с методом record(span), например Metrics()
+        :param storage: Локальное хранилище: результаты get_marks, get_homeworks, get_visits, get_class_rank
+                        и get_past_final_marks записываются в него, query читает из него
+        :param shared: Общие данные школы и класса. Клиенты учащихся одной школы с общим экземпляром получают
+                       меню, информацию о школе и краткое расписание класса одним запросом
+
+        """
+        self.token_manager = token_manager
+        self.account = account
+        if token is None and token_manager is None:
+            raise ValueError('Нужен token или token_manager')
+        self.token = token or await token_manager.get(account)
+        self._own_transport = transport is None
+        self.transport = transport or Transport()
+        self.cache = cache
+        self.single_flight = single_flight or SingleFlight()
+        self.retry = retry or RetryPolicy()
+        self.limiter = limiter
+        self.records = records
+        self.json_loads = json_loads or default_json_loads
+        self.child = child
+        self.hooks = hooks or []
+        self.storage = storage
+        self.shared = shared
+        self._options = dict(cache=cache, single_flight=self.single_flight, retry=retry, limiter=limiter,
+                             records=records, json_loads=json_loads, token_manager=token_manager, account=account,
+                             hooks=hooks, storage=storage, shared=shared)
+
+        for field in PROFILE_FIELDS:
+            setattr(self, field, None)
+        self.children: List[dict] = []
+        self._child_clients: Dict[int, 'Client'] = {}
+        if profile is not None:
+            self.restore(profile)
+        elif not lazy:
+            try:
+                await self.load_profile()
+            except BaseException:
+                await self.close()
+                raise
 
+    async def load_profile(self):
         """
-        self.token = token
+        Запрос профиля учащегося (family/web/v1/profile)
 
+        """
         user_profile = await self.make_request('family/web/v1/profile')
-        user_profile = user_profile['children'][0]
-
-        self.user_id = user_profile['id']
-        self.person_id = user_profile['contingent_guid']
-        self.first_name = user_profile['first_name']
-        self.middle_name = user_profile.get('middle_name')
-        self.last_name = user_profile['last_name']
-        self.birth_date = user_profile['birth_date']
-        self.class_level = user_profile['class_level_id']
-        self.class_name = user_profile['class_name']
-        self.class_unit = user_profile['class_unit_id']
-        self.snils = user_profile.get('snils')
-        self.phone = user_profile.get('phone')
-        self.school_id = user_profile['school']['id']
-        self.contract_id = user_profile['contract_id']
-        self.parents = [f'{parent.get('first_name')} {parent.get('last_name')}'
-                        for parent in user_profile.get('representatives', [{}])]
+        self.children = [parse_child_profile(child) for child in user_profile['children']]
+        self.restore(self.children[self.child])
+
+    async def ensure_profile(self, *fields):
+        """
+        Загрузка профиля, если какое-либо из полей fields ещё не известно
+
+        """
+        if any(getattr(self, field) is None for field in fields or ('user_id',)):
+            await self.load_profile()
+
+    def snapshot(self) -> dict:
+        """
+        Данные профиля для сохранения между перезапусками: Client(token, profile=snapshot)
+
+        """
+        return {**{field: getattr(self, field) for field in PROFILE_FIELDS}, 'children': self.children}
+
+    def restore(self, profile: dict):
+        """
+        Восстановление данных профиля из snapshot(). Отсутствующие поля будут запрошены при необходимости
+
+        """
+        for field in PROFILE_FIELDS:
+            if profile.get(field) is not None:
+                setattr(self, field, profile[field])
+        if profile.get('children'):
+            self.children = profile['children']
+
+    async def child_client(self, child) -> 'Client':
+        """
+        Клиент для другого ребёнка того же аккаунта: общие токен, соединения и настройки, без запроса профиля
+        :param child: Номер ребёнка в self.children
+
+        """
+        if child == self.child:
+            return self
+        if child not in self._child_clients:
+            await self.ensure_profile('user_id')
+            client = await Client(self.token, transport=self.transport, profile=self.children[child], child=child,
+                                  **self._options)
+            client.children = self.children
+            self._child_clients[child] = client
+        return self._child_clients[child]
+
+    async def for_children(self, method, *args, **kwargs) -> Dict[int, Any]:
+        """
+        Параллельный вызов метода для всех детей аккаунта
+        :param method: Название метода, например 'get_marks'
+        :return: Результаты по user_id ребёнка
+
+        """
+        await self.ensure_profile('user_id')
+        clients = [await self.child_client(child) for child in range(len(self.children))]
+        results = await asyncio.gather(*(getattr(client, method)(*args, **kwargs) for client in clients))
+        return {client.user_id: result for client, result in zip(clients, results)}
+
+    async def get_children_marks(self, from_date=date.today(), to_date=date.today()) -> Dict[int, List[BaseMarkType]]:
+        """
+        Оценки всех детей аккаунта за радиус дат, по user_id ребёнка
+
+        """
+        return await self.for_children('get_marks', from_date=from_date, to_date=to_date)
+
+    async def get_children_homeworks(self, from_date=date.today(),
+                                     to_date=date.today()) -> Dict[int, List[HouseworkType]]:
+        """
+        Домашние задания всех детей аккаунта за радиус дат, по user_id ребёнка
+
+        """
+        return await self.for_children('get_homeworks', from_date=from_date, to_date=to_date)
+
+    async def get_children_schedule(self, request_date=date.today()) -> Dict[int, List[ScheduleType]]:
+        """
+        Расписание всех детей аккаунта за дату, по user_id ребёнка
+
+        """
+        return await self.for_children('get_schedule', request_date=request_date)
+
+    async def get_overview(self, from_date=None, to_date=None, parts=tuple(OVERVIEW_PARTS),
+                           timeout: float = None) -> Overview:
+        """
+        Все данные для страницы учащегося одним вызовом: части запрашиваются одновременно,
+        поэтому время ответа определяется самым медленным запросом. Ошибка части не прерывает остальные
+        :param from_date: Необходимая дата начала. По умолчанию - сегодня
+        :param to_date: Необходимая дата окончания. По умолчанию - from_date
+        :param parts: Названия частей из OVERVIEW_PARTS: schedule, homeworks, marks, notifications, menu, visits
+        :param timeout: Общий срок в секундах. Не успевшие части попадают в errors с RequestTimeoutError
+        :return: Overview(results, errors) - данные и ошибки по названиям частей
+
+        """
+        unknown = set(parts) - set(OVERVIEW_PARTS)
+        if unknown:
+            raise ValueError(f'Неизвестные части: {", ".join(sorted(unknown))}')
+        from_date = from_date or date.today()
+        to_date = to_date or from_date
+
+        tasks = {asyncio.ensure_future(OVERVIEW_PARTS[part](self, from_date, to_date)): part for part in parts}
+        if not tasks:
+            return Overview({}, {})
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        results, errors = {}, {}
+        for task in pending:
+            task.cancel()
+            errors[tasks[task]] = RequestTimeoutError(f'Часть {tasks[task]} не получена за {timeout} с')
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            if task.exception() is not None:
+                errors[tasks[task]] = task.exception()
+            else:
+                results[tasks[task]] = task.result()
+        return Overview(results, errors)
+
+    def _require_storage(self):
+        if self.storage is None:
+            raise ValueError('Для query нужен Client(storage=...)')
+
+    async def query(self, kind, from_date, to_date, subjects=None, offline=False) -> list:
+        """
+        Данные за радиус дат из локального хранилища (Client(storage=...)). Даты, которых в нём нет,
+        сначала загружаются из сети и записываются в хранилище
+        :param kind: Вид данных: 'marks', 'homeworks', 'visits' или 'ranks'
+        :param from_date: Необходимая дата начала
+        :param to_date: Необходимая дата окончания
+        :param subjects: Названия предметов. По умолчанию - все
+        :param offline: Не обращаться к сети, вернуть только сохранённое
+
+        """
+        self._require_storage()
+        if kind not in STORED_METHODS:
+            raise ValueError(f'Неизвестный вид данных {kind!r}: доступны {", ".join(STORED_METHODS)}')
+        await self.ensure_profile('user_id')
+        if not offline:
+            fetch = getattr(self, STORED_METHODS[kind])
+            gaps = await self.storage.gaps(kind, self.user_id, from_date, to_date)
+            await asyncio.gather(*(fetch(start, end) for start, end in gaps))
+
+        rows = await self.storage.query(kind, self.user_id, from_date, to_date, subjects)
+        return [self._restore(STORED_KINDS[kind][0], row) for row in rows]
+
+    async def query_final_marks(self, class_number: int, offline=False) -> List[PrevYearMarksType]:
+        """
+        Итоговые оценки за прошлый год из локального хранилища; при отсутствии - из сети
+        :param class_number: номер класса от 1 до 11 включительно
+        :param offline: Не обращаться к сети, вернуть только сохранённое
+
+        """
+        self._require_storage()
+        await self.ensure_profile('user_id')
+        if not offline and not await self.storage.has_final_marks(self.user_id, class_number):
+            await self.get_past_final_marks(class_number)
+        rows = await self.storage.query('final_marks', self.user_id, class_number=class_number)
+        return [self._restore(PrevYearMarksType, row) for row in rows]
 
     async def make_request(self, method, **query_options):
         """
@@ -56,22 +322,169 @@ class Client(AsyncClass):
         :return: JSON
 
         """
+        if not self.hooks:
+            return self.json_loads(await self.make_raw_request(method, **query_options))
+
+        clock = time.perf_counter()
+        try:
+            body = await self.make_raw_request(method, **query_options)
+            started, decode_clock = time.time(), time.perf_counter()
+            data = self.json_loads(body)
+            self._emit('decode', method.split('?')[0], started, time.perf_counter() - decode_clock,
+                       bytes_in=len(body))
+            return data
+        finally:
+            spent = request_time.get()
+            if spent is not None:
+                spent[0] += time.perf_counter() - clock
+
+    async def make_raw_request(self, method, **query_options) -> bytes:
+        """
+        То же, что make_request, но возвращает тело ответа без разбора JSON:
+        его можно сразу записать в хранилище, не декодируя и не кодируя заново
+        :param method: нужный API-endpoint
+        :return: bytes
+
+        """
+        if self.shared is not None:
+            key = self.shared.key(self, method, query_options)
+            if key is not None:
+                return await self.shared.get(key, method, lambda: self._request(key, method, query_options))
+
+        identity = self.user_id if self.user_id is not None else hashlib.sha256(self.token.encode()).hexdigest()[:16]
+        key = make_request_key(method, query_options, identity)
+        return await self.single_flight.do(key, lambda: self._request(key, method, query_options))
+
+    def _emit(self, kind, name, start, duration, **attributes):
+        span = Span(kind, name, start, duration, attributes)
+        for hook in self.hooks:
+            hook.record(span)
+
+    async def _request(self, key, method, query_options) -> bytes:
+        if not self.hooks:
+            return await self._fetch(key, method, query_options, {})
+
+        info = {}
+        started, clock = time.time(), time.perf_counter()
+        try:
+            return await self._fetch(key, method, query_options, info)
+        except Exception as exc:
+            info['error'] = type(exc).__name__
+            raise
+        finally:
+            self._emit('request', method.split('?')[0], started, time.perf_counter() - clock, **info)
+
+    async def _fetch(self, key, method, query_options, info) -> bytes:
+        """
+        Кэш, отправка запроса и обработка ответа. В info записываются сведения для метрик
+
+        """
+        headers = {'auth-token': self.token, **HEADERS}
+
+        entry = None
+        cached = self.cache is not None and self.cache.ttl(method) is not None
+        if cached:
+            entry = await self.cache.get(key)
+            if entry is not None:
+                if entry.fresh:
+                    info['cached'] = 'hit'
+                    return entry.body
+                headers.update(entry.validators)
 
-        headers = {
-            'auth-token': self.token,
-            'x-mes-subsystem': 'familyweb',
-            'x-mes-role': 'student',
-            'origin': 'https://dnevnik.mos.ru/',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0'
-        }
+        result = await self._send(method, query_options, headers, info)
+        if result.status == 401 and self.token_manager is not None:
+            self.token = await self.token_manager.refresh(self.account, stale_token=headers['auth-token'])
+            headers['auth-token'] = self.token
+            result = await self._send(method, query_options, headers, info)
 
-        async with aiohttp.ClientSession(headers=headers) as session:
-            result = await session.get('https://school.mos.ru/api/' + method, params=query_options)
+        info['status'] = result.status
+        info['bytes_in'] = len(result.body)
+        if result.status == 304 and entry is not None:
+            info['cached'] = 'revalidated'
+            await self.cache.revalidate(key, method, entry)
+            return entry.body
+        if result.status != 200:
+            raise RequestError(result.status)
 
-            if result.status != 200:
-                raise RequestError(result.status)
-            return await result.json()
+        if cached:
+            await self.cache.store(key, method, result.body, result.headers)
+        return result.body
 
+    async def _send(self, method, query_options, headers, info) -> Response:
+        """
+        Отправка запроса с учётом ограничителей частоты, автоматического выключателя и политики повторов
+
+        """
+        transport = self.transport
+        limiters = [limiter for limiter in (transport.limiter, self.limiter) if limiter is not None]
+
+        for attempt in range(self.retry.attempts):
+            info['retries'] = attempt
+            if transport.breaker is not None:
+                transport.breaker.check()
+            for limiter in limiters:
+                await limiter.acquire()
+
+            retry_after = None
+            try:
+                result = await transport.get(transport.base_url + method, params=query_options, headers=headers,
+                                             timeout=self.retry.timeout)
+            except TransportError as exc:
+                error = exc
+            else:
+                if result.status not in self.retry.statuses:
+                    if transport.breaker is not None:
+                        transport.breaker.record_success()
+                    for limiter in limiters:
+                        limiter.on_success()
+                    return result
+
+                error = RequestError(result.status)
+                retry_after = result.headers.get('Retry-After')
+                if result.status == 429:
+                    for limiter in limiters:
+                        limiter.on_throttled()
+
+            if transport.breaker is not None:
+                transport.breaker.record_failure()
+            if attempt + 1 == self.retry.attempts:
+                raise error
+            await asyncio.sleep(self.retry.delay(attempt, retry_after))
+
+    def _model(self, model, records=None):
+        """
+        Конструктор результата: модель pydantic или, если records=True, соответствующая ей лёгкая запись
+        :param records: Выбор для отдельного вызова. None - как задано в Client
+
+        """
+        if records is None:
+            records = self.records
+        return RECORD_BUILDERS.get(model, model) if records else model
+
+    def _restore(self, model, row: dict):
+        """
+        Результат из сохранённого словаря (dump_row): модель или, если records=True, лёгкая запись
+
+        """
+        item = model(**row)
+        return RECORD_BUILDERS[model](**dict(item)) if self.records and model in RECORD_BUILDERS else item
+
+    async def close(self):
+        """
+        Освобождение соединений. Общий transport, переданный извне, не закрывается
+
+        """
+        await asyncio.gather(*(client.close() for client in self._child_clients.values()))
+        if self._own_transport:
+            await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @api_method('user_id')
     async def get_schedule(self, request_date=date.today()) -> List[ScheduleType]:
         """
         Получение расписания за дату
@@ -86,7 +499,7 @@ class Client(AsyncClass):
             lesson = activity.get('lesson', {})
             if lesson.get('lesson_education_type') == 'OO' or 'Разговоры' in lesson.get('subject_name', ''):
                 schedule.append(
-                    ScheduleType(
+                    self._model(ScheduleType)(
                         name=lesson['subject_name'],
                         room_number=activity['room_number'],
                         marks=None if not lesson['marks'] else await parse_marks_from_lesson(lesson['marks']),
@@ -98,6 +511,7 @@ class Client(AsyncClass):
 
         return schedule if schedule else None
 
+    @api_method('user_id')
     async def get_schedule_short(self, dates: list) -> Dict[str, List[ShortScheduleType]]:
         """
         Получение краткого расписания, без оценок, кабинетов и замен
@@ -110,7 +524,7 @@ class Client(AsyncClass):
 
         for day in raw_ss['payload']:
             short_schedule[day['date']] = [
-                ShortScheduleType(
+                self._model(ShortScheduleType)(
                     name=s_lesson['subject_name'] if s_lesson['subject_name'] else s_lesson['group_name'],
                     start_time=s_lesson['begin_time'],
                     end_time=s_lesson['end_time']
@@ -121,6 +535,33 @@ class Client(AsyncClass):
 
         return short_schedule
 
+    async def get_schedule_range(self, from_date, to_date, short=False, chunk_size=31,
+                                 concurrency=10) -> Dict[str, list]:
+        """
+        Получение расписания за радиус дат. Даты запрашиваются параллельно, результат - словарь по датам
+        :param from_date: Необходимая дата начала
+        :param to_date: Необходимая дата окончания
+        :param short: Краткое расписание (ShortScheduleType). Запрашивается пачками по chunk_size дат за один запрос
+        :param chunk_size: Количество дат в одном запросе краткого расписания
+        :param concurrency: Максимальное число одновременных запросов
+
+        """
+        days = list(date_range(from_date, to_date))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(call, *args):
+            async with semaphore:
+                return await call(*args)
+
+        if short:
+            chunks = await asyncio.gather(*(fetch(self.get_schedule_short, chunk)
+                                            for chunk in chunked(days, chunk_size)))
+            return {day: lessons for chunk in chunks for day, lessons in chunk.items()}
+
+        schedules = await asyncio.gather(*(fetch(self.get_schedule, day) for day in days))
+        return {str(day): schedule or [] for day, schedule in zip(days, schedules)}
+
+    @api_method('class_level', 'user_id')
     async def get_periods_schedule(self) -> List[PeriodsScheduleType]:
         """
         Получение расписания учебных периодов и каникул
@@ -134,7 +575,7 @@ class Client(AsyncClass):
 
         for period in raw_periods[0]['periods']:
             period_schedule.append(
-                PeriodsScheduleType(
+                self._model(PeriodsScheduleType)(
                     name=period['name'],
                     starts=period.get('begin_date'),
                     ends=period.get('end_date')
@@ -143,11 +584,15 @@ class Client(AsyncClass):
 
         return period_schedule
 
-    async def get_homeworks(self, from_date=date.today(), to_date=date.today()) -> List[HouseworkType]:
+    @stored('homeworks')
+    @api_method('user_id')
+    async def get_homeworks(self, from_date=date.today(), to_date=date.today(),
+                            records: bool = None) -> List[HouseworkType]:
         """
         Получение домашнего задания за радиус дат
         :param from_date: Необходимая дата начала. По умолчанию - сегодня
         :param to_date: Необходимая дата окончания. По умолчанию - сегодня
+        :param records: Лёгкие записи вместо моделей для этого вызова. None - как задано в Client
 
         """
         homeworks = []
@@ -159,24 +604,28 @@ class Client(AsyncClass):
         for homework in raw_homeworks['payload']:
             material = homework.get('additional_materials', [{}])
             homeworks.append(
-                HouseworkType(
+                self._model(HouseworkType, records)(
                     subject_name=homework['subject_name'],
-                    hw_date=dt.strptime(homework['date'], '%Y-%m-%d'),
+                    hw_date=parse_date(homework['date']),
                     description=homework['description'],
                     attached_files=[item['link'] for shit in material
                                     if shit['type'] == 'attachments' for item in shit['items']],
                     attached_tests=[item['urls'][0]['url'] for shit in material
-                                    if shit['type'] == 'test_spec_binding' for item in shit['items']]
+                                    if shit['type'] == 'test_spec_binding' for item in shit['items']],
+                    id=homework.get('homework_entry_id')
                 )
             )
 
         return homeworks
 
-    async def get_marks(self, from_date=date.today(), to_date=date.today()) -> List[BaseMarkType]:
+    @stored('marks')
+    @api_method('user_id')
+    async def get_marks(self, from_date=date.today(), to_date=date.today(), records: bool = None) -> List[BaseMarkType]:
         """
         Получение оценок за радиус дат
         :param from_date: Необходимая дата начала. По умолчанию - сегодня
         :param to_date: Необходимая дата окончания. По умолчанию - сегодня
+        :param records: Лёгкие записи вместо моделей для этого вызова. None - как задано в Client
 
         """
         marks = []
@@ -187,17 +636,19 @@ class Client(AsyncClass):
 
         for mark in raw_mark['payload']:
             marks.append(
-                BaseMarkType(
+                self._model(BaseMarkType, records)(
                     subject_name=mark['subject_name'],
-                    mark_date=dt.strptime(mark['date'], '%Y-%m-%d'),
+                    mark_date=parse_date(mark['date']),
                     value=mark['value'],
                     weight=mark['weight'],
-                    reason=mark.get('control_form_name')
+                    reason=mark.get('control_form_name'),
+                    id=mark.get('id')
                 )
             )
 
         return marks
 
+    @api_method('user_id')
     async def get_period_marks(self, year_id, period_id=0) -> List[TrimesterMarksType]:
         """
         Получение оценок за оценочный период
@@ -216,7 +667,7 @@ class Client(AsyncClass):
             except IndexError:
                 continue
             period_marks.append(
-                TrimesterMarksType(
+                self._model(TrimesterMarksType)(
                     subject_name=subject['subject_name'],
                     marks=[
                         mark['values'][0]['original'] + MARK_WEIGHTS_SYMBOLS[mark['weight']]
@@ -230,6 +681,8 @@ class Client(AsyncClass):
 
         return period_marks
 
+    @stored('final_marks')
+    @api_method('user_id')
     async def get_past_final_marks(self, class_number: int) -> List[PrevYearMarksType]:
         """
         Получение итоговых оценок за прошлые года
@@ -247,7 +700,7 @@ class Client(AsyncClass):
 
         for value in raw_prev_year:
             prev_year_marks.append(
-                PrevYearMarksType(
+                self._model(PrevYearMarksType)(
                     subject_name=value['subject_name'],
                     final_mark=value.get('value'),
                 )
@@ -255,6 +708,7 @@ class Client(AsyncClass):
 
         return prev_year_marks
 
+    @api_method('class_unit', 'school_id')
     async def get_school_info(self) -> SchoolInfoType:
         """
         Получение информации о школе
@@ -265,7 +719,7 @@ class Client(AsyncClass):
         if not school_info:
             return
 
-        return SchoolInfoType(
+        return self._model(SchoolInfoType)(
             name=school_info['name'],
             principal=school_info['principal'],
             address=school_info['address']['address'],
@@ -274,6 +728,7 @@ class Client(AsyncClass):
             branches=len(school_info['branches'])
         )
 
+    @api_method('contract_id')
     async def get_menu(self, request_date=date.today()) -> List[ComplexMealType]:
         """
         Получение меню блюд школьной столовой на весь [указанный] день
@@ -287,14 +742,14 @@ class Client(AsyncClass):
             return
 
         for item in raw_menu['menu']:
-            meals = [MealType(
+            meals = [self._model(MealType)(
                 name=meal['name'],
                 ingredients=meal['ingredients'],
                 calories=meal['nutrition']['calories'])
                 for meal in item['meals']]
 
             menu.append(
-                ComplexMealType(
+                self._model(ComplexMealType)(
                     title=item['title'],
                     price=item['summary'] / 100,
                     composition=meals
@@ -303,6 +758,7 @@ class Client(AsyncClass):
 
         return menu
 
+    @api_method('contract_id')
     async def get_menu_buffet(self, request_date=date.today()) -> List[BuffetMenuType]:
         """
         Получение меню школьного буфета (не столовой)
@@ -317,7 +773,7 @@ class Client(AsyncClass):
 
         for item in raw_menu['menu'][0]['items']:
             buffet_menu.append(
-                BuffetMenuType(
+                self._model(BuffetMenuType)(
                     name=item['name'],
                     full_name=item['full_name'],
                     is_available=bool(item['available_now']),
@@ -327,11 +783,14 @@ class Client(AsyncClass):
 
         return buffet_menu
 
-    async def get_visits(self, from_date, to_date=date.today()) -> VisitType:
+    @stored('visits')
+    @api_method('contract_id')
+    async def get_visits(self, from_date, to_date=date.today(), records: bool = None) -> VisitType:
         """
         Получение посещаемости занятий
         :param to_date: Необходимая дата. По умолчанию - сегодня
         :param from_date: Необходимая дата. По умолчанию - сегодня
+        :param records: Лёгкие записи вместо моделей для этого вызова. None - как задано в Client
 
         """
         visits = []
@@ -343,7 +802,7 @@ class Client(AsyncClass):
         for visit in raw_visits['payload']:
             visit_data = visit['visits'][0]
             visits.append(
-                VisitType(
+                self._model(VisitType, records)(
                     visit_date=visit['date'],
                     in_time=visit_data['in'],
                     out_time=visit_data['out'],
@@ -353,9 +812,11 @@ class Client(AsyncClass):
 
         return visits
 
-    async def get_notifications(self) -> List[NotificationType]:
+    @api_method('user_id')
+    async def get_notifications(self, records: bool = None) -> List[NotificationType]:
         """
         Получение уведомлений аккаунта
+        :param records: Лёгкие записи вместо моделей для этого вызова. None - как задано в Client
 
         """
         notifications = []
@@ -364,8 +825,8 @@ class Client(AsyncClass):
 
         for notification in raw_notifications:
             notifications.append(
-                NotificationType(
-                    event_date=dt.strptime(notification['datetime'], '%Y-%m-%d %H:%M:%S.%f'),
+                self._model(NotificationType, records)(
+                    event_date=parse_date(notification['datetime']),
                     event_name=notification['event_type'],
                     subject_name=notification['subject_name'],
                     hw_description=notification.get('new_hw_description'),
@@ -376,11 +837,24 @@ class Client(AsyncClass):
 
         return notifications
 
-    async def get_class_rank(self, date_from=date.today(), date_to=date.today()) -> List[RankingType]:
+    def watch_notifications(self, **options) -> AsyncIterator[NotificationType]:
+        """
+        Бесконечный поток новых уведомлений: async for notification in user.watch_notifications()
+        :param options: Параметры NotificationWatcher (store, interval, min_interval, max_interval, replay, ...)
+
+        """
+        from .watch import NotificationWatcher
+        return NotificationWatcher(self, **options).__aiter__()
+
+    @stored('ranks')
+    @api_method('person_id')
+    async def get_class_rank(self, date_from=date.today(), date_to=date.today(),
+                             records: bool = None) -> List[RankingType]:
         """
         Получение рейтинга ученика в его классе за радиус дат.
         :param: date_from: с даты...
         :param: date_to: ...по дату
+        :param records: Лёгкие записи вместо моделей для этого вызова. None - как задано в Client
 
         """
         ranking = []
@@ -389,14 +863,15 @@ class Client(AsyncClass):
 
         for day in raw_ranking:
             ranking.append(
-                RankingType(
-                    rank_date=dt.strptime(day['date'], '%Y-%m-%d'),
+                self._model(RankingType, records)(
+                    rank_date=parse_date(day['date']),
                     place=day['rankPlace']
                 )
             )
 
         return ranking
 
+    @api_method('person_id', 'user_id')
     async def get_docs(self) -> List[DocumentType]:
         """
         Позволяет получить документы пользователя
@@ -410,7 +885,7 @@ class Client(AsyncClass):
 
         for doc in raw_docs['documents']:
             docs.append(
-                DocumentType(
+                self._model(DocumentType)(
                     type_id=doc['document_type_id'],
                     series=doc.get('series'),
                     number=doc.get('number'),
@@ -421,6 +896,7 @@ class Client(AsyncClass):
 
         return docs
 
+    @api_method('user_id')
     async def get_subjects(self) -> List:
         """
         Получение списка учебных предметов (всех)
@@ -432,3 +908,56 @@ class Client(AsyncClass):
         return [
             subject.get('subject_name') for subject in raw_subjects['payload']
         ]
+
+    async def _iterate(self, method, from_date, to_date, chunk_days, records=None) -> AsyncIterator:
+        """
+        Обход радиуса дат частями по chunk_days дней. Следующая часть запрашивается, пока выдаётся текущая,
+        поэтому в памяти не более двух частей независимо от длины радиуса
+
+        """
+        fetch = partial(getattr(self, method), records=records)
+        chunks = [(chunk[0], chunk[-1]) for chunk in chunked(list(date_range(from_date, to_date)), chunk_days)]
+        task = None
+        try:
+            for index, (start, end) in enumerate(chunks):
+                items = await (task or fetch(start, end))
+                task = asyncio.ensure_future(fetch(*chunks[index + 1])) if index + 1 < len(chunks) else None
+                for item in items or []:
+                    yield item
+        finally:
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    def iter_marks(self, from_date, to_date, chunk_days=31, records: bool = None) -> AsyncIterator[BaseMarkType]:
+        """
+        Оценки за радиус дат потоком: async for mark in user.iter_marks(...).
+        Радиус запрашивается частями, поэтому память не зависит от его длины
+        :param chunk_days: Количество дней в одном запросе
+
+        """
+        return self._iterate('get_marks', from_date, to_date, chunk_days, records)
+
+    def iter_homeworks(self, from_date, to_date, chunk_days=31, records: bool = None) -> AsyncIterator[HouseworkType]:
+        """
+        Домашние задания за радиус дат потоком
+        :param chunk_days: Количество дней в одном запросе
+
+        """
+        return self._iterate('get_homeworks', from_date, to_date, chunk_days, records)
+
+    def iter_visits(self, from_date, to_date, chunk_days=31, records: bool = None) -> AsyncIterator[VisitType]:
+        """
+        Посещаемость за радиус дат потоком
+        :param chunk_days: Количество дней в одном запросе
+
+        """
+        return self._iterate('get_visits', from_date, to_date, chunk_days, records)
+
+    def iter_class_rank(self, from_date, to_date, chunk_days=31, records: bool = None) -> AsyncIterator[RankingType]:
+        """
+        Рейтинг в классе за радиус дат потоком
+        :param chunk_days: Количество дней в одном запросе
+
+        """
+        return self._iterate('get_class_rank', from_date, to_date, chunk_days, records)
@@ -0,0 +1,139 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import NamedTuple, Dict, Optional, List
+
+
+# Время, проведённое в make_request внутри текущего метода Client (для расчёта времени построения моделей)
+request_time: ContextVar[Optional[List[float]]] = ContextVar('aiomes_request_time', default=None)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Span(NamedTuple):
+    """
+    Этап работы клиента:
+    - request - запрос к API (name - endpoint), атрибуты status, bytes_in, retries, cached, error
+    - decode - разбор JSON (name - endpoint), атрибут bytes_in
+    - build - построение моделей методом Client (name - метод)
+
+    """
+    kind: str
+    name: str
+    start: float
+    duration: float
+    attributes: dict
+
+    def to_otel(self) -> dict:
+        """
+        Представление в духе OpenTelemetry: имя, время начала / окончания в наносекундах и атрибуты
+
+        """
+        return {
+            'name': f'aiomes.{self.kind} {self.name}',
+            'start_time_unix_nano': int(self.start * 1e9),
+            'end_time_unix_nano': int((self.start + self.duration) * 1e9),
+            'attributes': {key: value for key, value in self.attributes.items() if value is not None}
+        }
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, metric, labels) -> List[str]:
+        lines, total = [], 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {total}')
+        lines.append(f'{metric}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{metric}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class Metrics:
+    """
+    Сбор метрик из Client(hooks=[metrics]) и их выгрузка в текстовом формате Prometheus.
+    Один экземпляр можно передать всем клиентам процесса
+
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.latency: Dict[str, Histogram] = defaultdict(lambda: Histogram(self.buckets))
+        self.decode: Dict[str, Histogram] = defaultdict(lambda: Histogram(self.buckets))
+        self.build: Dict[str, Histogram] = defaultdict(lambda: Histogram(self.buckets))
+        self.requests: Dict[tuple, int] = defaultdict(int)
+        self.bytes_in: Dict[str, int] = defaultdict(int)
+        self.retries: Dict[str, int] = defaultdict(int)
+
+    def record(self, span: Span):
+        attributes = span.attributes
+        if span.kind == 'request':
+            self.latency[span.name].observe(span.duration)
+            status = attributes.get('cached') or attributes.get('status') or attributes.get('error')
+            self.requests[(span.name, str(status))] += 1
+            self.bytes_in[span.name] += attributes.get('bytes_in') or 0
+            self.retries[span.name] += attributes.get('retries') or 0
+        elif span.kind == 'decode':
+            self.decode[span.name].observe(span.duration)
+        elif span.kind == 'build':
+            self.build[span.name].observe(span.duration)
+
+    def to_prometheus(self) -> str:
+        lines = ['# TYPE aiomes_request_duration_seconds histogram']
+        for endpoint, histogram in sorted(self.latency.items()):
+            lines += histogram.lines('aiomes_request_duration_seconds', f'endpoint="{endpoint}"')
+
+        lines.append('# TYPE aiomes_requests_total counter')
+        for (endpoint, status), count in sorted(self.requests.items()):
+            lines.append(f'aiomes_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+        lines.append('# TYPE aiomes_response_bytes_total counter')
+        for endpoint, count in sorted(self.bytes_in.items()):
+            lines.append(f'aiomes_response_bytes_total{{endpoint="{endpoint}"}} {count}')
+
+        lines.append('# TYPE aiomes_retries_total counter')
+        for endpoint, count in sorted(self.retries.items()):
+            lines.append(f'aiomes_retries_total{{endpoint="{endpoint}"}} {count}')
+
+        lines.append('# TYPE aiomes_decode_duration_seconds histogram')
+        for endpoint, histogram in sorted(self.decode.items()):
+            lines += histogram.lines('aiomes_decode_duration_seconds', f'endpoint="{endpoint}"')
+
+        lines.append('# TYPE aiomes_build_duration_seconds histogram')
+        for method, histogram in sorted(self.build.items()):
+            lines += histogram.lines('aiomes_build_duration_seconds', f'method="{method}"')
+
+        return '\n'.join(lines) + '\n'
+
+
+class TracingHook:
+    """
+    Передача этапов в OpenTelemetry в виде span'ов (нужен пакет opentelemetry-api)
+
+    """
+
+    def __init__(self, tracer=None):
+        """
+        :param tracer: Tracer OpenTelemetry. По умолчанию - trace.get_tracer('aiomes')
+
+        """
+        if tracer is None:
+            from opentelemetry import trace
+            tracer = trace.get_tracer('aiomes')
+        self.tracer = tracer
+
+    def record(self, span: Span):
+        otel = span.to_otel()
+        self.tracer.start_span(
+            otel['name'], start_time=otel['start_time_unix_nano'], attributes=otel['attributes']
+        ).end(end_time=otel['end_time_unix_nano'])
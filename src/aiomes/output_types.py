@@ -1,5 +1,6 @@
+from sys import intern
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, NamedTuple, Dict, Any, Tuple
 from datetime import datetime
 
 
@@ -9,6 +10,7 @@ class HouseworkType(BaseModel):
     description: str
     attached_tests: list
     attached_files: list
+    id: Optional[int] = None
 
 
 class ScheduleType(BaseModel):
@@ -32,6 +34,7 @@ class BaseMarkType(BaseModel):
     value: str
     weight: int
     reason: Optional[str]
+    id: Optional[int] = None
 
 
 class TrimesterMarksType(BaseModel):
@@ -107,3 +110,111 @@ class PeriodsScheduleType(BaseModel):
     name: str
     starts: Optional[str]
     ends: Optional[str]
+
+
+def _intern(value):
+    return intern(value) if type(value) is str else value
+
+
+# Лёгкие записи без проверки pydantic для массовых выгрузок (Client(records=True)).
+# Поля совпадают с соответствующими моделями, to_model() возвращает полноценную модель.
+# compact() создаёт запись с общими копиями повторяющихся у тысяч учащихся строк (названия предметов, формы контроля,
+# виды событий, ссылки на вложения): они интернируются, списки вложений хранятся кортежами
+
+
+class HouseworkRecord(NamedTuple):
+    subject_name: str
+    hw_date: datetime
+    description: str
+    attached_tests: Tuple[str, ...]
+    attached_files: Tuple[str, ...]
+    id: Optional[int] = None
+
+    @classmethod
+    def compact(cls, subject_name, hw_date, description, attached_tests, attached_files, id=None):
+        return cls(_intern(subject_name), hw_date, description, tuple(map(_intern, attached_tests)),
+                   tuple(map(_intern, attached_files)), id)
+
+    def to_model(self) -> HouseworkType:
+        return HouseworkType(**self._asdict())
+
+
+class MarkRecord(NamedTuple):
+    subject_name: str
+    mark_date: datetime
+    value: str
+    weight: int
+    reason: Optional[str]
+    id: Optional[int] = None
+
+    @classmethod
+    def compact(cls, subject_name, mark_date, value, weight, reason, id=None):
+        return cls(_intern(subject_name), mark_date, _intern(value), weight, _intern(reason), id)
+
+    def to_model(self) -> BaseMarkType:
+        return BaseMarkType(**self._asdict())
+
+
+class VisitRecord(NamedTuple):
+    visit_date: str
+    in_time: str
+    out_time: str
+    duration: str
+
+    @classmethod
+    def compact(cls, visit_date, in_time, out_time, duration):
+        return cls(_intern(visit_date), _intern(in_time), _intern(out_time), _intern(duration))
+
+    def to_model(self) -> VisitType:
+        return VisitType(**self._asdict())
+
+
+class RankingRecord(NamedTuple):
+    rank_date: datetime
+    place: int
+
+    @classmethod
+    def compact(cls, rank_date, place):
+        return cls(rank_date, place)
+
+    def to_model(self) -> RankingType:
+        return RankingType(**self._asdict())
+
+
+class NotificationRecord(NamedTuple):
+    event_date: datetime
+    event_name: str
+    subject_name: str
+    hw_description: Optional[str]
+    mark_value: Optional[str]
+    mark_weight: Optional[int]
+
+    @classmethod
+    def compact(cls, event_date, event_name, subject_name, hw_description, mark_value, mark_weight):
+        return cls(event_date, _intern(event_name), _intern(subject_name), hw_description, _intern(mark_value),
+                   mark_weight)
+
+    def to_model(self) -> NotificationType:
+        return NotificationType(**self._asdict())
+
+
+RECORD_TYPES = {
+    HouseworkType: HouseworkRecord,
+    BaseMarkType: MarkRecord,
+    VisitType: VisitRecord,
+    RankingType: RankingRecord,
+    NotificationType: NotificationRecord
+}
+
+
+# Конструкторы лёгких записей по моделям
+RECORD_BUILDERS = {model: record.compact for model, record in RECORD_TYPES.items()}
+
+
+class Overview(NamedTuple):
+    """
+    Результат Client.get_overview: данные частей и ошибки тех частей, которые получить не удалось
+
+    """
+    results: Dict[str, Any]
+    errors: Dict[str, BaseException]
@@ -0,0 +1,240 @@
+import asyncio
+from async_class import AsyncClass
+from typing import Dict, NamedTuple, Any, Optional, AsyncIterator
+from .main import Client
+from .transport import Transport, BaseTransport
+from .throttle import RateLimiter, CircuitBreaker
+from .singleflight import SingleFlight
+from .watch import NotificationWatcher
+
+
+class PoolResult(NamedTuple):
+    client: Optional[Client]
+    result: Any
+    error: Optional[BaseException]
+
+
+class ClientPool(AsyncClass):
+    """
+    Набор клиентов на общем пуле соединений для массового опроса множества аккаунтов
+
+    """
+
+    async def __ainit__(self, tokens=(), transport: BaseTransport = None, concurrency=100, limit_per_host=0,
+                        limiter: RateLimiter = None, breaker: CircuitBreaker = None, token_rate: float = None,
+                        profiles: Dict[str, dict] = None, **client_options):
+        """
+        :param tokens: Токены учащихся
+        :param transport: Общий пул соединений. По умолчанию создаётся собственный
+        :param concurrency: Максимальное число одновременно выполняемых запросов во всём пуле
+        :param limit_per_host: Максимальное число соединений с одним хостом. 0 - без ограничений.
+                               Только для собственного пула соединений, как и limiter и breaker
+        :param limiter: Общий ограничитель частоты запросов для собственного пула соединений
+        :param breaker: Автоматический выключатель для собственного пула соединений
+        :param token_rate: Максимальное число запросов в секунду для каждого учащегося
+        :param profiles: Сохранённые профили по токенам (ClientPool.snapshot()). Для них профиль не запрашивается
+        :param client_options: Дополнительные параметры Client (cache, retry, ...).
+                               single_flight по умолчанию общий для всех клиентов пула
+
+        """
+        if transport is not None and (limit_per_host or limiter is not None or breaker is not None):
+            raise ValueError('limit_per_host, limiter и breaker задаются в переданном transport')
+        self._own_transport = transport is None
+        self.transport = transport or Transport(limit=concurrency, limit_per_host=limit_per_host,
+                                                limiter=limiter, breaker=breaker)
+        self.concurrency = concurrency
+        self.token_rate = token_rate
+        self.client_options = client_options
+        self.client_options.setdefault('single_flight', SingleFlight())
+        self.profiles = profiles or {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+        self.clients: Dict[str, Client] = {}
+        self.failed: Dict[str, BaseException] = {}
+
+        await self.add(*tokens)
+
+    async def add(self, *tokens):
+        """
+        Добавление аккаунтов в пул. Токены, для которых не удалось получить профиль, попадают в failed
+        :param tokens: Токены учащихся
+
+        """
+        async for token, client, error in self._run(tokens, self._create_client):
+            if error is None:
+                self.clients[token] = client
+                self.failed.pop(token, None)
+            else:
+                self.failed[token] = error
+
+    def _create_client(self, token):
+        limiter = RateLimiter(self.token_rate) if self.token_rate else None
+        return Client(token, transport=self.transport, limiter=limiter, profile=self.profiles.get(token),
+                      **self.client_options)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Профили всех учащихся пула по токенам для быстрого перезапуска: ClientPool(tokens, profiles=snapshot)
+
+        """
+        return {token: client.snapshot() for token, client in self.clients.items()}
+
+    async def remove(self, token):
+        """
+        Удаление аккаунта из пула
+        :param token: Токен учащегося
+
+        """
+        client = self.clients.pop(token, None)
+        if client is not None:
+            await client.close()
+
+    def map(self, method, *args, **kwargs) -> AsyncIterator[PoolResult]:
+        """
+        Вызов метода Client для всех аккаунтов пула. Результаты отдаются по мере готовности,
+        ошибки не прерывают обход, а возвращаются в поле error
+        :param method: Название метода Client, например 'get_marks', или корутинная функция method(client, ...)
+
+        """
+        if isinstance(method, str):
+            return self._run(self.clients.values(), lambda client: getattr(client, method)(*args, **kwargs))
+        return self._run(self.clients.values(), lambda client: method(client, *args, **kwargs))
+
+    def get_marks(self, from_date, to_date) -> AsyncIterator[PoolResult]:
+        """
+        Оценки всех учащихся пула за радиус дат
+
+        """
+        return self.map('get_marks', from_date=from_date, to_date=to_date)
+
+    def get_homeworks(self, from_date, to_date) -> AsyncIterator[PoolResult]:
+        """
+        Домашние задания всех учащихся пула за радиус дат
+
+        """
+        return self.map('get_homeworks', from_date=from_date, to_date=to_date)
+
+    def get_schedule(self, request_date) -> AsyncIterator[PoolResult]:
+        """
+        Расписание всех учащихся пула за дату
+
+        """
+        return self.map('get_schedule', request_date=request_date)
+
+    async def watch_notifications(self, **options) -> AsyncIterator[PoolResult]:
+        """
+        Общий поток новых уведомлений всех учащихся пула. Одновременные опросы ограничены concurrency.
+        Если опрос учащегося завершился ошибкой, она выдаётся в поле error и его опрос прекращается
+        :param options: Параметры NotificationWatcher (store, interval, ...)
+
+        """
+        queue = asyncio.Queue(maxsize=self.concurrency)
+
+        async def watch(client):
+            try:
+                async for notification in NotificationWatcher(client, semaphore=self._semaphore, **options):
+                    await queue.put(PoolResult(client, notification, None))
+            except Exception as exc:
+                await queue.put(PoolResult(client, None, exc))
+            await queue.put(None)
+
+        tasks = [asyncio.ensure_future(watch(client)) for client in self.clients.values()]
+        running = len(tasks)
+        try:
+            while running:
+                item = await queue.get()
+                if item is None:
+                    running -= 1
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stream(self, method, *args, **kwargs) -> AsyncIterator[PoolResult]:
+        """
+        Потоковый обход всех учащихся пула методом iter_* (например, 'iter_marks'): по одной записи в result.
+        Одновременно обходятся не более concurrency учащихся, очередь записей ограничена, поэтому память
+        не зависит ни от числа учащихся, ни от объёма данных. Ошибка учащегося выдаётся в поле error
+        :param method: Название потокового метода Client
+
+        """
+        queue = asyncio.Queue(maxsize=self.concurrency)
+        clients = iter(list(self.clients.values()))
+
+        async def worker():
+            for client in clients:
+                try:
+                    async for item in getattr(client, method)(*args, **kwargs):
+                        await queue.put(PoolResult(client, item, None))
+                except Exception as exc:
+                    await queue.put(PoolResult(client, None, exc))
+            await queue.put(None)
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(min(self.concurrency, len(self.clients)))]
+        running = len(tasks)
+        try:
+            while running:
+                item = await queue.get()
+                if item is None:
+                    running -= 1
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, items, factory) -> AsyncIterator[PoolResult]:
+        """
+        Выполнение factory(item) для каждого элемента не более чем в concurrency задачах одновременно.
+        Задачи создаются по мере освобождения мест, поэтому память не растёт с количеством аккаунтов
+
+        """
+        async def call(item):
+            async with self._semaphore:
+                try:
+                    return PoolResult(item, await factory(item), None)
+                except Exception as exc:
+                    return PoolResult(item, None, exc)
+
+        items = iter(list(items))
+        pending = set()
+        try:
+            while True:
+                for item in items:
+                    pending.add(asyncio.ensure_future(call(item)))
+                    if len(pending) >= self.concurrency:
+                        break
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __iter__(self):
+        return iter(self.clients.values())
+
+    async def close(self):
+        """
+        Закрытие всех клиентов и собственного пула соединений
+
+        """
+        await asyncio.gather(*(client.close() for client in self.clients.values()))
+        if self._own_transport:
+            await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,86 @@
+import time
+from typing import NamedTuple, Optional, Dict, Tuple
+from .cache import BaseCache, MemoryCache, CacheEntry, DAY
+from .singleflight import SingleFlight
+
+
+class SharedScope(NamedTuple):
+    """
+    Область, в которой ответ endpoint одинаков для всех учащихся
+
+    """
+    fields: Tuple[str, ...]
+    student_params: Tuple[str, ...]
+    ttl: float
+
+
+# fields - поля профиля Client, задающие область (школа, класс); student_params - параметры запроса,
+# указывающие на конкретного учащегося, они не входят в ключ
+SHARED_SCOPES = {
+    'family/web/v1/menu': SharedScope(('school_id',), ('contract_id',), 60 * 60),
+    'family/web/v1/menu/buffet': SharedScope(('school_id',), ('contract_id',), 60 * 60),
+    'family/web/v1/school_info': SharedScope(('school_id',), ('class_unit_id', 'school_id'), DAY),
+    'family/web/v1/schedule/short': SharedScope(('class_unit',), ('student_id',), 60 * 60)
+}
+
+
+class SharedResources:
+    """
+    Общие данные школы и класса (меню, буфет, информация о школе, краткое расписание класса).
+    Клиенты с одним экземпляром SharedResources получают такие данные одним запросом на школу / класс
+    за время ttl вместо запроса от каждого учащегося
+
+    """
+
+    def __init__(self, scopes: Dict[str, SharedScope] = None, backend: BaseCache = None):
+        """
+        :param scopes: Общие endpoint и их области. По умолчанию - SHARED_SCOPES
+        :param backend: Хранилище ответов. По умолчанию - MemoryCache
+
+        """
+        self.scopes = SHARED_SCOPES if scopes is None else scopes
+        self.backend = backend if backend is not None else MemoryCache()
+        self.single_flight = SingleFlight()
+        self.requests = 0
+        self.fetches = 0
+
+    def key(self, client, method, query_options) -> Optional[str]:
+        """
+        Ключ общего ответа или None, если endpoint не общий либо область учащегося ещё неизвестна
+
+        """
+        scope = self.scopes.get(method.split('?')[0])
+        if scope is None:
+            return None
+        values = [getattr(client, field) for field in scope.fields]
+        if any(value is None for value in values):
+            return None
+        params = '&'.join(f'{name}={value}' for name, value in sorted(query_options.items())
+                          if name not in scope.student_params)
+        return f'shared:{method}:{":".join(map(str, values))}:{params}'
+
+    async def get(self, key, method, fetch) -> bytes:
+        """
+        Общий ответ: из хранилища, если он ещё действителен, иначе - один запрос fetch() на всех ожидающих
+
+        """
+        self.requests += 1
+        entry = await self.backend.get(key)
+        if entry is not None and entry.fresh:
+            return entry.body
+
+        async def load():
+            body = await fetch()
+            self.fetches += 1
+            ttl = self.scopes[method.split('?')[0]].ttl
+            await self.backend.set(key, CacheEntry(body, time.time() + ttl))
+            return body
+
+        return await self.single_flight.do(key, load)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {'requests': self.requests, 'fetches': self.fetches}
+
+    async def close(self):
+        await self.backend.close()
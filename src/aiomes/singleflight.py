@@ -0,0 +1,47 @@
+import asyncio
+from typing import Dict
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых запросов: пока запрос с данным ключом выполняется,
+    повторные вызовы ждут его результат вместо отправки нового HTTP-запроса.
+    Результат общий для всех ожидающих и не должен изменяться вызывающим кодом
+
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    async def do(self, key, func):
+        """
+        :param key: Ключ запроса
+        :param func: Функция без аргументов, возвращающая корутину запроса
+
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._done(key, done))
+        else:
+            self.deduplicated += 1
+
+        # shield: отмена одного из ожидающих не должна отменять запрос для остальных
+        return await asyncio.shield(future)
+
+    def _done(self, key, future):
+        self._in_flight.pop(key, None)
+        if not future.cancelled():
+            future.exception()  # ошибка доставляется ожидающим; здесь лишь помечаем её полученной
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {'calls': self.calls, 'deduplicated': self.deduplicated, 'in_flight': self.in_flight}
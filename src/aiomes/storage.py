@@ -0,0 +1,184 @@
+import inspect
+import json
+from datetime import date, timedelta
+from functools import wraps
+from typing import List, Iterable, Tuple
+from .database import SQLiteDatabase
+from .output_types import *
+from .utils import dump_row
+
+# Вид данных -> (модель, поле даты). Для итоговых оценок прошлых лет вместо даты хранится номер класса
+STORED_KINDS = {
+    'marks': (BaseMarkType, 'mark_date'),
+    'homeworks': (HouseworkType, 'hw_date'),
+    'visits': (VisitType, 'visit_date'),
+    'ranks': (RankingType, 'rank_date'),
+    'final_marks': (PrevYearMarksType, None)
+}
+
+
+class SQLiteStorage(SQLiteDatabase):
+    """
+    Локальное хранилище оценок, Д/З, посещаемости, рейтинга и итоговых оценок прошлых лет в базе SQLite.
+    Client(storage=...) записывает в него результаты запросов; для каждого учащегося хранятся
+    загруженные радиусы дат, поэтому Client.query обращается к сети только за недостающими датами.
+    Данные последних settle_days дней ещё могут измениться и считаются незагруженными
+
+    """
+
+    def __init__(self, path='aiomes_storage.sqlite', settle_days=14):
+        """
+        :param path: Путь к файлу базы. ':memory:' - база в памяти
+        :param settle_days: Через сколько дней данные считаются окончательными
+
+        """
+        super().__init__(path)
+        self.settle_days = settle_days
+        self._db.executescript(
+            'CREATE TABLE IF NOT EXISTS records ('
+            'kind TEXT NOT NULL, student INTEGER NOT NULL, day TEXT, subject TEXT, data TEXT NOT NULL);'
+            'CREATE INDEX IF NOT EXISTS records_day ON records (kind, student, day);'
+            'CREATE INDEX IF NOT EXISTS records_subject ON records (kind, student, subject, day);'
+            'CREATE TABLE IF NOT EXISTS coverage ('
+            'kind TEXT NOT NULL, student INTEGER NOT NULL, from_day TEXT NOT NULL, to_day TEXT NOT NULL, '
+            'PRIMARY KEY (kind, student, from_day));'
+        )
+
+    def _put(self, kind, student, rows, from_day, to_day, settled_day):
+        date_field = STORED_KINDS[kind][1]
+        self._db.execute('BEGIN')
+        try:
+            self._db.execute('DELETE FROM records WHERE kind = ? AND student = ? AND day BETWEEN ? AND ?',
+                             (kind, student, from_day, to_day))
+            self._db.executemany('INSERT INTO records VALUES (?, ?, ?, ?, ?)', [
+                (kind, student, row[date_field][:10] if date_field else from_day, row.get('subject_name'),
+                 json.dumps(row, ensure_ascii=False))
+                for row in rows
+            ])
+            if date_field is None:
+                self._db.execute('INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)',
+                                 (kind, student, from_day, to_day))
+            elif from_day <= settled_day:
+                self._cover(kind, student, from_day, min(to_day, settled_day))
+            self._db.execute('COMMIT')
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+
+    def _cover(self, kind, student, from_day, to_day):
+        """
+        Добавление радиуса к загруженным с объединением пересекающихся и соседних радиусов
+
+        """
+        ranges = sorted(self._ranges(kind, student) + [(from_day, to_day)])
+        merged = [ranges[0]]
+        for start, end in ranges[1:]:
+            last_start, last_end = merged[-1]
+            if start <= _next_day(last_end):
+                merged[-1] = (last_start, max(last_end, end))
+            else:
+                merged.append((start, end))
+        self._db.execute('DELETE FROM coverage WHERE kind = ? AND student = ?', (kind, student))
+        self._db.executemany('INSERT INTO coverage VALUES (?, ?, ?, ?)',
+                             [(kind, student, start, end) for start, end in merged])
+
+    def _ranges(self, kind, student) -> List[tuple]:
+        return self._db.execute('SELECT from_day, to_day FROM coverage WHERE kind = ? AND student = ? '
+                                'ORDER BY from_day', (kind, student)).fetchall()
+
+    async def put(self, kind, student, items: Iterable, from_date=None, to_date=None, class_number=None):
+        """
+        Запись результата запроса: прежние записи за радиус заменяются новыми, радиус отмечается загруженным
+        :param kind: Вид данных из STORED_KINDS
+        :param student: user_id учащегося
+        :param items: Модели или записи
+        :param class_number: Номер класса для итоговых оценок прошлых лет (kind='final_marks')
+
+        """
+        rows = [dump_row(item) for item in items or ()]
+        if kind == 'final_marks':
+            scope = f'{class_number:02d}'
+            await self._execute(self._put, kind, student, rows, scope, scope, None)
+            return
+        settled = str(date.today() - timedelta(self.settle_days))
+        await self._execute(self._put, kind, student, rows, str(from_date), str(to_date), settled)
+
+    async def gaps(self, kind, student, from_date, to_date) -> List[Tuple[date, date]]:
+        """
+        Радиусы дат внутри [from_date, to_date], которых нет в хранилище
+
+        """
+        gaps, start = [], from_date
+        for covered_from, covered_to in await self._execute(self._ranges, kind, student):
+            covered_from, covered_to = date.fromisoformat(covered_from), date.fromisoformat(covered_to)
+            if covered_to < start:
+                continue
+            if covered_from > to_date:
+                break
+            if covered_from > start:
+                gaps.append((start, covered_from - timedelta(1)))
+            start = max(start, covered_to + timedelta(1))
+        if start <= to_date:
+            gaps.append((start, to_date))
+        return gaps
+
+    async def has_final_marks(self, student, class_number) -> bool:
+        scope = f'{class_number:02d}'
+        return any(start == scope for start, _ in await self._execute(self._ranges, 'final_marks', student))
+
+    def _query(self, sql, parameters):
+        return [json.loads(row[0]) for row in self._db.execute(sql, parameters)]
+
+    async def query(self, kind, student, from_date=None, to_date=None, subjects: Iterable[str] = None,
+                    class_number=None) -> List[dict]:
+        """
+        Записи из хранилища без обращения к сети, по возрастанию даты
+        :param subjects: Названия предметов. По умолчанию - все
+        :param class_number: Номер класса для итоговых оценок прошлых лет
+
+        """
+        sql = 'SELECT data FROM records WHERE kind = ? AND student = ?'
+        parameters = [kind, student]
+        if kind == 'final_marks':
+            from_date = to_date = f'{class_number:02d}'
+        if from_date is not None:
+            sql += ' AND day >= ?'
+            parameters.append(str(from_date))
+        if to_date is not None:
+            sql += ' AND day <= ?'
+            parameters.append(str(to_date))
+        if subjects is not None:
+            subjects = list(subjects)
+            sql += f' AND subject IN ({", ".join("?" * len(subjects))})'
+            parameters += subjects
+        return await self._execute(self._query, sql + ' ORDER BY day, rowid', parameters)
+
+
+def stored(kind):
+    """
+    Декоратор методов Client: результат записывается в Client.storage, если оно подключено.
+    Радиус дат - первые два аргумента метода, для итоговых оценок - номер класса
+
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            result = await func(self, *args, **kwargs)
+            if self.storage is not None:
+                await self.ensure_profile('user_id')
+                arguments = signature.bind(self, *args, **kwargs)
+                arguments.apply_defaults()
+                scope = list(arguments.arguments.values())[1:3]
+                if kind == 'final_marks':
+                    await self.storage.put(kind, self.user_id, result, class_number=scope[0])
+                else:
+                    await self.storage.put(kind, self.user_id, result, *scope)
+            return result
+        return wrapper
+    return decorator
+
+
+def _next_day(day: str) -> str:
+    return str(date.fromisoformat(day) + timedelta(1))
@@ -0,0 +1,158 @@
+import json
+from datetime import date, timedelta
+from typing import NamedTuple, Optional, Dict, List
+from .database import SQLiteDatabase
+from .main import Client
+from .output_types import *
+from .utils import dump_row
+
+
+class SyncDiff(NamedTuple):
+    added: list
+    changed: list
+    removed: list
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+
+class BaseSyncStore:
+    """
+    Хранилище состояния синхронизации: водяной знак (дата последней синхронизации)
+    и ранее полученные записи для каждого учащегося и вида данных
+
+    """
+
+    async def load(self, student, kind) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def save(self, student, kind, state: dict):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemorySyncStore(BaseSyncStore):
+    def __init__(self):
+        self._states: Dict[tuple, dict] = {}
+
+    async def load(self, student, kind) -> Optional[dict]:
+        return self._states.get((student, kind))
+
+    async def save(self, student, kind, state: dict):
+        self._states[(student, kind)] = state
+
+
+class SQLiteSyncStore(SQLiteDatabase, BaseSyncStore):
+    """
+    Состояние синхронизации в базе SQLite, переживает перезапуск процесса
+
+    """
+
+    def __init__(self, path='aiomes_sync.sqlite'):
+        super().__init__(path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS sync_state ('
+                         'student TEXT, kind TEXT, state TEXT, PRIMARY KEY (student, kind))')
+
+    def _load(self, student, kind):
+        row = self._db.execute('SELECT state FROM sync_state WHERE student = ? AND kind = ?',
+                               (str(student), kind)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def load(self, student, kind) -> Optional[dict]:
+        return await self._execute(self._load, student, kind)
+
+    async def save(self, student, kind, state: dict):
+        await self._execute(self._db.execute, 'INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)',
+                            (str(student), kind, json.dumps(state, ensure_ascii=False)))
+
+
+class Sync:
+    """
+    Инкрементальная синхронизация оценок и домашних заданий.
+    Первый вызов загружает весь период начиная с since, следующие - только окно вокруг водяного знака,
+    в котором данные ещё могут измениться, и возвращают разницу с предыдущим состоянием
+
+    """
+
+    def __init__(self, client: Client, store: BaseSyncStore = None, lookback=14, lookahead=14):
+        """
+        :param client: Клиент учащегося
+        :param store: Хранилище состояния. По умолчанию - MemorySyncStore
+        :param lookback: Сколько дней до последней синхронизации перепроверять (оценки выставляют задним числом)
+        :param lookahead: На сколько дней вперёд загружать домашние задания
+
+        """
+        self.client = client
+        self.store = store if store is not None else MemorySyncStore()
+        self.lookback = lookback
+        self.lookahead = lookahead
+
+    async def sync_marks(self, since: date = None) -> SyncDiff:
+        """
+        :param since: Начало периода для первой синхронизации. По умолчанию - lookback дней назад
+
+        """
+        return await self._sync('marks', self.client.get_marks, BaseMarkType, 'mark_date', since, 0)
+
+    async def sync_homeworks(self, since: date = None) -> SyncDiff:
+        """
+        :param since: Начало периода для первой синхронизации. По умолчанию - lookback дней назад
+
+        """
+        return await self._sync('homeworks', self.client.get_homeworks, HouseworkType, 'hw_date',
+                                since, self.lookahead)
+
+    async def _sync(self, kind, fetch, model, date_field, since, lookahead) -> SyncDiff:
+        await self.client.ensure_profile('user_id')
+        today = date.today()
+        state = await self.store.load(self.client.user_id, kind)
+
+        if state is None:
+            state = {'watermark': None, 'rows': {}}
+            from_date = since or today - timedelta(self.lookback)
+        else:
+            from_date = date.fromisoformat(state['watermark']) - timedelta(self.lookback)
+        to_date = today + timedelta(lookahead)
+
+        fresh = {}
+        for item in await fetch(from_date=from_date, to_date=to_date) or []:
+            row = dump_row(item)
+            fresh[_identity(row)] = row
+
+        rows = state['rows']
+        window = [key for key, row in rows.items()
+                  if from_date <= date.fromisoformat(row[date_field][:10]) <= to_date]
+
+        added = [key for key in fresh if key not in rows]
+        changed = [key for key in fresh if key in rows and rows[key] != fresh[key]]
+        removed = [key for key in window if key not in fresh]
+
+        diff = SyncDiff(
+            added=[self.client._restore(model, fresh[key]) for key in added],
+            changed=[self.client._restore(model, fresh[key]) for key in changed],
+            removed=[self.client._restore(model, rows[key]) for key in removed]
+        )
+
+        for key in removed:
+            del rows[key]
+        rows.update(fresh)
+        state['watermark'] = str(today)
+        await self.store.save(self.client.user_id, kind, state)
+
+        return diff
+
+    async def rows(self, kind) -> List[dict]:
+        """
+        Все известные записи вида kind ('marks' или 'homeworks') из хранилища, без обращения к сети
+
+        """
+        state = await self.store.load(self.client.user_id, kind)
+        return list(state['rows'].values()) if state else []
+
+
+def _identity(row) -> str:
+    if row.get('id') is not None:
+        return str(row['id'])
+    return json.dumps(row, sort_keys=True, ensure_ascii=False)
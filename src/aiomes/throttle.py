@@ -0,0 +1,142 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from .errors import *
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов по алгоритму token bucket.
+    В адаптивном режиме частота уменьшается вдвое на каждый ответ 429 и плавно восстанавливается после успешных ответов
+
+    """
+
+    def __init__(self, rate: float, burst: int = None, adaptive=True, min_rate: float = None):
+        """
+        :param rate: Максимальное число запросов в секунду
+        :param burst: Максимальное число запросов подряд без ожидания. По умолчанию - rate
+        :param adaptive: Подстраивать частоту под ответы 429
+        :param min_rate: Нижняя граница частоты в адаптивном режиме. По умолчанию - rate / 16
+
+        """
+        self.max_rate = self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.burst = burst or max(1, int(rate))
+        self.adaptive = adaptive
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def on_throttled(self):
+        if self.adaptive:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def on_success(self):
+        if self.adaptive and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель: после failure_threshold ошибок сервера подряд запросы отклоняются
+    без обращения к сети в течение recovery_time секунд, затем пропускается один пробный запрос
+
+    """
+
+    def __init__(self, failure_threshold=10, recovery_time=30):
+        """
+        :param failure_threshold: Число ошибок подряд, после которого выключатель размыкается
+        :param recovery_time: Время в секундах до пробного запроса
+
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.recovery_time:
+            return 'half-open'
+        return 'open'
+
+    def check(self):
+        """
+        :raises CircuitOpenError: если запрос нужно отклонить
+
+        """
+        state = self.state
+        if state == 'open' or (state == 'half-open' and self._probing):
+            raise CircuitOpenError
+        if state == 'half-open':
+            self._probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Политика повторов с экспоненциальной задержкой и случайным разбросом (full jitter).
+    Заголовок Retry-After, если сервер его прислал, имеет приоритет над расчётной задержкой
+
+    """
+
+    def __init__(self, attempts=3, backoff=0.5, max_backoff=30, timeout=30,
+                 statuses=(429, 500, 502, 503, 504)):
+        """
+        :param attempts: Общее число попыток, включая первую. Не меньше 1
+        :param backoff: Базовая задержка в секундах
+        :param max_backoff: Максимальная задержка в секундах
+        :param timeout: Время ожидания ответа на одну попытку в секундах. None - без ограничения
+        :param statuses: Коды ответа, после которых запрос повторяется
+
+        """
+        if attempts < 1:
+            raise ValueError('attempts должно быть не меньше 1')
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.statuses = statuses
+
+    def delay(self, attempt, retry_after: str = None) -> float:
+        """
+        :param attempt: Номер неудавшейся попытки, начиная с 0
+        :param retry_after: Значение заголовка Retry-After
+
+        """
+        if retry_after:
+            try:
+                return min(self.max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                try:
+                    until = parsedate_to_datetime(retry_after)
+                    return min(self.max_backoff, max(0.0, (until - datetime.now(timezone.utc)).total_seconds()))
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
@@ -0,0 +1,157 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+from .utils import parse_date
+
+
+class Lesson(NamedTuple):
+    start: datetime
+    end: datetime
+    name: str
+    room_number: Optional[str] = None
+    is_replaced: bool = False
+
+
+class Window(NamedTuple):
+    start: datetime
+    end: datetime
+
+    @property
+    def duration(self) -> timedelta:
+        return self.end - self.start
+
+
+def lesson_datetime(day: date, value: str) -> datetime:
+    """
+    Время урока API ('08:30' или '2024-09-02T08:30:00') на дату day
+
+    """
+    if len(value) <= 8:
+        return datetime.combine(day, time.fromisoformat(value))
+    return datetime.combine(day, parse_date(value).time())
+
+
+class Timetable:
+    """
+    Индекс расписания для мгновенных ответов «какой урок сейчас / следующий / где окна» без запросов к API.
+    Уроки каждого ключа (user_id учащегося или class_unit класса) хранятся отсортированными по началу,
+    поиск - бинарный, за O(log n). Обновление дня заменяет только уроки этого дня
+
+    """
+
+    def __init__(self):
+        self._lessons: Dict[Any, List[Lesson]] = {}
+        self._starts: Dict[Any, List[datetime]] = {}
+
+    def update_day(self, key, day, lessons) -> List[Lesson]:
+        """
+        Замена уроков ключа за день
+        :param key: Ключ расписания: user_id учащегося, class_unit класса или любой другой
+        :param day: Дата (date или строка 'YYYY-MM-DD')
+        :param lessons: Результат get_schedule (ScheduleType) или значение get_schedule_short (ShortScheduleType)
+        :return: Уроки, которых не было в индексе: новые и замены (is_replaced)
+
+        """
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        day_lessons = sorted((
+            Lesson(lesson_datetime(day, lesson.start_time), lesson_datetime(day, lesson.end_time), lesson.name,
+                   getattr(lesson, 'room_number', None), getattr(lesson, 'is_replaced', False))
+            for lesson in lessons or ()
+        ), key=lambda lesson: (lesson.start, lesson.end))
+
+        stored = self._lessons.setdefault(key, [])
+        starts = self._starts.setdefault(key, [])
+        begin = bisect_left(starts, datetime.combine(day, time.min))
+        end = bisect_left(starts, datetime.combine(day + timedelta(1), time.min))
+        previous = set(stored[begin:end])
+
+        stored[begin:end] = day_lessons
+        starts[begin:end] = [lesson.start for lesson in day_lessons]
+        return [lesson for lesson in day_lessons if lesson not in previous]
+
+    def update(self, key, schedule: Dict[str, list]) -> List[Lesson]:
+        """
+        Замена уроков ключа за несколько дней: результат get_schedule_range или get_schedule_short
+
+        """
+        changed = []
+        for day, lessons in schedule.items():
+            changed.extend(self.update_day(key, day, lessons))
+        return changed
+
+    async def refresh(self, client, request_date=None) -> List[Lesson]:
+        """
+        Загрузка расписания учащегося за дату (get_schedule) в индекс по client.user_id
+        :param request_date: Необходимая дата. По умолчанию - сегодня
+        :return: Новые и заменённые уроки
+
+        """
+        request_date = request_date or date.today()
+        lessons = await client.get_schedule(request_date)
+        return self.update_day(client.user_id, request_date, lessons)
+
+    async def refresh_class(self, client, dates: list) -> List[Lesson]:
+        """
+        Загрузка краткого расписания класса за даты (get_schedule_short) в индекс по client.class_unit
+
+        """
+        await client.ensure_profile('class_unit')
+        return self.update(client.class_unit, await client.get_schedule_short(dates))
+
+    def day(self, key, day=None) -> List[Lesson]:
+        """
+        Уроки за день. По умолчанию - сегодня
+
+        """
+        day = day or date.today()
+        starts = self._starts.get(key, [])
+        begin = bisect_left(starts, datetime.combine(day, time.min))
+        end = bisect_left(starts, datetime.combine(day + timedelta(1), time.min))
+        return self._lessons[key][begin:end] if starts else []
+
+    def current(self, key, moment: datetime = None) -> Optional[Lesson]:
+        """
+        Урок, идущий в момент moment. По умолчанию - сейчас
+
+        """
+        moment = moment or datetime.now()
+        index = bisect_right(self._starts.get(key, []), moment) - 1
+        if index >= 0 and self._lessons[key][index].end > moment:
+            return self._lessons[key][index]
+
+    def next(self, key, moment: datetime = None) -> Optional[Lesson]:
+        """
+        Ближайший урок, начинающийся после момента moment. По умолчанию - после текущего времени
+
+        """
+        moment = moment or datetime.now()
+        starts = self._starts.get(key, [])
+        index = bisect_right(starts, moment)
+        if index < len(starts):
+            return self._lessons[key][index]
+
+    def windows(self, key, day=None, min_duration=timedelta(0)) -> List[Window]:
+        """
+        Окна между уроками за день длиннее min_duration. Перемены тоже окна: для поиска «настоящих»
+        окон укажите min_duration больше перемены, например timedelta(minutes=30)
+
+        """
+        lessons = self.day(key, day)
+        windows = []
+        latest = None
+        for lesson in lessons:
+            if latest is not None and lesson.start - latest > min_duration:
+                windows.append(Window(latest, lesson.start))
+            latest = lesson.end if latest is None else max(latest, lesson.end)
+        return windows
+
+    def replaced(self, key, day=None) -> List[Lesson]:
+        """
+        Заменённые уроки за день
+
+        """
+        return [lesson for lesson in self.day(key, day) if lesson.is_replaced]
+
+    def __contains__(self, key):
+        return bool(self._starts.get(key))
@@ -0,0 +1,212 @@
+import asyncio
+import base64
+import json
+import time
+from typing import Dict, Optional, NamedTuple
+from .database import SQLiteDatabase
+from .errors import TokenRefreshError
+from .user_auth import AUTH_STATES, FA_STATES
+
+# Состояния входа AUTH ('2FA_NEEDED', 'INCORRECT_CREDS', ...), которые obtain_token возвращает вместо токена
+AUTH_RESULTS = frozenset(AUTH_STATES.values()) | frozenset(FA_STATES.values())
+
+
+def token_expiry(token) -> Optional[float]:
+    """
+    Время истечения токена (unix time) из поля exp JWT. Подпись не проверяется.
+    None - если токен не является JWT или не содержит exp
+
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+class StoredToken(NamedTuple):
+    token: str
+    expires: Optional[float]
+
+
+class BaseTokenStore:
+    async def get(self, account) -> Optional[StoredToken]:
+        raise NotImplementedError
+
+    async def set(self, account, token: StoredToken):
+        raise NotImplementedError
+
+    async def accounts(self) -> list:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryTokenStore(BaseTokenStore):
+    def __init__(self):
+        self._tokens: Dict[str, StoredToken] = {}
+
+    async def get(self, account) -> Optional[StoredToken]:
+        return self._tokens.get(account)
+
+    async def set(self, account, token: StoredToken):
+        self._tokens[account] = token
+
+    async def accounts(self) -> list:
+        return list(self._tokens)
+
+
+class SQLiteTokenStore(SQLiteDatabase, BaseTokenStore):
+    """
+    Хранение токенов в базе SQLite. С ключом key токены шифруются (Fernet, нужен пакет cryptography)
+
+    """
+
+    def __init__(self, path='aiomes_tokens.sqlite', key: bytes = None):
+        """
+        :param path: Путь к файлу базы
+        :param key: Ключ шифрования Fernet (cryptography.fernet.Fernet.generate_key()). None - без шифрования
+
+        """
+        self._fernet = None
+        if key is not None:
+            from cryptography.fernet import Fernet
+            self._fernet = Fernet(key)
+
+        super().__init__(path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS tokens (account TEXT PRIMARY KEY, token BLOB, expires REAL)')
+
+    def _get(self, account):
+        row = self._db.execute('SELECT token, expires FROM tokens WHERE account = ?', (account,)).fetchone()
+        if row is None:
+            return None
+        token = self._fernet.decrypt(row[0]).decode() if self._fernet else row[0]
+        return StoredToken(token, row[1])
+
+    async def get(self, account) -> Optional[StoredToken]:
+        return await self._execute(self._get, account)
+
+    async def set(self, account, token: StoredToken):
+        value = self._fernet.encrypt(token.token.encode()) if self._fernet else token.token
+        await self._execute(self._db.execute, 'INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)',
+                            (account, value, token.expires))
+
+    def _accounts(self):
+        return [row[0] for row in self._db.execute('SELECT account FROM tokens')]
+
+    async def accounts(self) -> list:
+        return await self._execute(self._accounts)
+
+
+class TokenManager:
+    """
+    Хранение и обновление токенов. Токены, срок которых истекает в ближайшие refresh_before секунд,
+    обновляются в фоне; Client с token_manager при ответе 401 один раз повторяет запрос с новым токеном
+
+    """
+
+    def __init__(self, refresh, store: BaseTokenStore = None, refresh_before=60 * 60, check_interval=5 * 60,
+                 concurrency=4):
+        """
+        :param refresh: Корутинная функция refresh(account) -> str, получающая новый токен
+                        (например, через AuthPool.obtain_token). Другой результат - TokenRefreshError
+        :param store: Хранилище токенов. По умолчанию - MemoryTokenStore
+        :param refresh_before: За сколько секунд до истечения обновлять токен
+        :param check_interval: Интервал фоновой проверки сроков в секундах
+        :param concurrency: Максимальное число одновременных обновлений
+
+        """
+        self._refresh = refresh
+        self.store = store if store is not None else MemoryTokenStore()
+        self.refresh_before = refresh_before
+        self.check_interval = check_interval
+        self.errors: Dict[str, BaseException] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._refreshing: Dict[str, asyncio.Future] = {}
+        self._task = None
+
+    async def set(self, account, token):
+        await self.store.set(account, StoredToken(token, token_expiry(token)))
+
+    async def get(self, account) -> str:
+        """
+        Действующий токен аккаунта. Отсутствующий или истёкший токен обновляется сразу
+
+        """
+        stored = await self.store.get(account)
+        if stored is None or (stored.expires is not None and stored.expires <= time.time()):
+            return await self.refresh(account)
+        return stored.token
+
+    async def refresh(self, account, stale_token=None) -> str:
+        """
+        Получение нового токена. Одновременные обновления одного аккаунта объединяются
+        :param stale_token: Токен, отвергнутый сервером. Если в хранилище уже другой, он и возвращается
+
+        """
+        if stale_token is not None:
+            stored = await self.store.get(account)
+            if stored is not None and stored.token != stale_token:
+                return stored.token
+
+        future = self._refreshing.get(account)
+        if future is None:
+            future = asyncio.ensure_future(self._do_refresh(account))
+            self._refreshing[account] = future
+            future.add_done_callback(lambda _: self._refreshing.pop(account, None))
+        return await asyncio.shield(future)
+
+    async def _do_refresh(self, account) -> str:
+        async with self._semaphore:
+            try:
+                token = await self._refresh(account)
+                if not isinstance(token, str) or not token or token in AUTH_RESULTS:
+                    raise TokenRefreshError(f'Функция обновления вернула не токен: {token!r}')
+            except Exception as exc:
+                self.errors[account] = exc
+                raise
+        self.errors.pop(account, None)
+        await self.set(account, token)
+        return token
+
+    async def refresh_expiring(self):
+        """
+        Обновление всех токенов, срок которых истекает в ближайшие refresh_before секунд
+
+        """
+        deadline = time.time() + self.refresh_before
+        expiring = []
+        for account in await self.store.accounts():
+            stored = await self.store.get(account)
+            if stored is not None and stored.expires is not None and stored.expires <= deadline:
+                expiring.append(account)
+        await asyncio.gather(*(self.refresh(account) for account in expiring), return_exceptions=True)
+
+    async def _refresh_loop(self):
+        while True:
+            await self.refresh_expiring()
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        """
+        Запуск фонового обновления токенов
+
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._refresh_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.store.close()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
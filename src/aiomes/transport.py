@@ -0,0 +1,202 @@
+import asyncio
+import aiohttp
+from typing import NamedTuple, Mapping
+from .errors import *
+from .throttle import RateLimiter, CircuitBreaker
+
+
+API_URL = 'https://school.mos.ru/api/'
+
+
+class Response(NamedTuple):
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+
+
+class BaseTransport:
+    """
+    Интерфейс транспорта Client: GET-запрос с полным чтением тела ответа.
+    Общие для всех клиентов ограничитель частоты и автоматический выключатель хранятся в транспорте
+
+    """
+
+    def __init__(self, limiter: RateLimiter = None, breaker: CircuitBreaker = None, base_url=API_URL):
+        """
+        :param limiter: Общий для всех клиентов ограничитель частоты запросов. По умолчанию не используется
+        :param breaker: Общий для всех клиентов автоматический выключатель. По умолчанию не используется
+        :param base_url: Адрес API. По умолчанию - school.mos.ru; для тестов можно указать локальный сервер
+
+        """
+        self.limiter = limiter
+        self.breaker = breaker
+        self.base_url = base_url
+
+    async def get(self, url, params=None, headers=None, timeout: float = None) -> Response:
+        """
+        :param timeout: Время ожидания ответа в секундах. None - без ограничения
+        :raise RequestTimeoutError: Ответ не получен за timeout
+        :raise TransportError: Ошибка соединения
+
+        """
+        raise NotImplementedError
+
+    @property
+    def closed(self) -> bool:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class Transport(BaseTransport):
+    """
+    Долгоживущий пул HTTP/1.1-соединений с school.mos.ru (aiohttp).
+    Один экземпляр можно передать в любое количество Client — все они будут переиспользовать
+    одни и те же TCP/TLS-соединения.
+
+    """
+
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=30, ttl_dns_cache=300,
+                 limiter: RateLimiter = None, breaker: CircuitBreaker = None, base_url=API_URL, **session_options):
+        """
+        :param limit: Максимальное число одновременно открытых соединений. 0 - без ограничений
+        :param limit_per_host: Максимальное число соединений с одним хостом. 0 - без ограничений
+        :param keepalive_timeout: Сколько секунд держать простаивающее соединение открытым
+        :param ttl_dns_cache: Время жизни DNS-кэша в секундах. None - кэшировать навсегда
+        :param limiter: Общий для всех клиентов ограничитель частоты запросов. По умолчанию не используется
+        :param breaker: Общий для всех клиентов автоматический выключатель. По умолчанию не используется
+        :param base_url: Адрес API. По умолчанию - school.mos.ru; для тестов можно указать локальный сервер
+        :param session_options: Дополнительные параметры для aiohttp.ClientSession
+
+        """
+        super().__init__(limiter, breaker, base_url)
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.session_options = session_options
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Сессия создаётся лениво, внутри работающего event loop, при первом запросе
+
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.ttl_dns_cache
+            )
+            self._session = aiohttp.ClientSession(connector=connector, **self.session_options)
+        return self._session
+
+    async def get(self, url, params=None, headers=None, timeout: float = None) -> Response:
+        """
+        GET-запрос с полным чтением тела ответа
+        :param timeout: Время ожидания ответа в секундах. None - без ограничения
+
+        """
+        try:
+            async with self.session.get(url, params=params, headers=headers,
+                                        timeout=aiohttp.ClientTimeout(total=timeout)) as result:
+                return Response(result.status, result.headers, await result.read())
+        except asyncio.TimeoutError:
+            raise RequestTimeoutError from None
+        except aiohttp.ClientError as exc:
+            raise TransportError(f'Ошибка соединения: {exc!r}') from exc
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    async def close(self):
+        """
+        Закрытие всех соединений пула
+
+        """
+        if not self.closed:
+            await self._session.close()
+        self._session = None
+
+
+class HTTP2Transport(BaseTransport):
+    """
+    Пул HTTP/2-соединений (httpx, нужен пакет httpx[http2]). Одновременные запросы множества клиентов
+    передаются параллельными потоками через несколько соединений вместо отдельного соединения на запрос
+
+    """
+
+    def __init__(self, max_connections=10, keepalive_timeout=30, http1=True, limiter: RateLimiter = None,
+                 breaker: CircuitBreaker = None, base_url=API_URL, **client_options):
+        """
+        :param max_connections: Максимальное число соединений
+        :param keepalive_timeout: Сколько секунд держать простаивающее соединение открытым
+        :param http1: Разрешить HTTP/1.1 для серверов без HTTP/2. При http1=False HTTP/2 используется
+                      и без TLS (http://), например с локальной имитацией API
+        :param limiter: Общий для всех клиентов ограничитель частоты запросов. По умолчанию не используется
+        :param breaker: Общий для всех клиентов автоматический выключатель. По умолчанию не используется
+        :param base_url: Адрес API. По умолчанию - school.mos.ru
+        :param client_options: Дополнительные параметры для httpx.AsyncClient
+
+        """
+        import httpx
+        super().__init__(limiter, breaker, base_url)
+        self._httpx = httpx
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.http1 = http1
+        self.client_options = client_options
+        self._client = None
+
+    @property
+    def client(self):
+        """
+        httpx.AsyncClient создаётся лениво, при первом запросе
+
+        """
+        if self._client is None or self._client.is_closed:
+            limits = self._httpx.Limits(max_connections=self.max_connections,
+                                        keepalive_expiry=self.keepalive_timeout)
+            self._client = self._httpx.AsyncClient(http1=self.http1, http2=True, limits=limits,
+                                                   **self.client_options)
+        return self._client
+
+    async def get(self, url, params=None, headers=None, timeout: float = None) -> Response:
+        """
+        GET-запрос с полным чтением тела ответа
+        :param timeout: Время ожидания ответа в секундах. None - без ограничения
+
+        """
+        # Часть параметров методов API уже записана в url ('...?from=...'): httpx заменил бы их на params
+        url = self._httpx.URL(url).copy_merge_params(params or {})
+        try:
+            result = await self.client.get(url, headers=headers, timeout=timeout)
+        except self._httpx.TimeoutException:
+            raise RequestTimeoutError from None
+        except self._httpx.HTTPError as exc:
+            raise TransportError(f'Ошибка соединения: {exc!r}') from exc
+        return Response(result.status_code, result.headers, result.content)
+
+    @property
+    def closed(self) -> bool:
+        return self._client is None or self._client.is_closed
+
+    async def close(self):
+        """
+        Закрытие всех соединений пула
+
+        """
+        if not self.closed:
+            await self._client.aclose()
+        self._client = None
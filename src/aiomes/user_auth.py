@@ -1,3 +1,8 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Dict
 from .errors import *
 from async_class import AsyncClass
 
@@ -18,10 +23,43 @@ FA_STATES = {SUCCESS_URL: 'SUCCESS',
 
 
 class AUTH(AsyncClass):
-    async def __ainit__(self, ap):
-        self.browser = await ap.firefox.launch()
+    async def __ainit__(self, ap=None, browser=None):
+        """
+        :param ap: Объект async_playwright. Запускается собственный браузер, закрываемый после получения токена
+        :param browser: Уже запущенный браузер (см. AuthPool). Закрывается только отдельный контекст входа
+
+        """
+        self._own_browser = browser is None
+        self.browser = browser or await ap.firefox.launch()
         self.context = await self.browser.new_context()
         self.page = await self.context.new_page()
+        self.timings: Dict[str, float] = {}
+        self._closed = False
+
+    @asynccontextmanager
+    async def _stage(self, name):
+        """
+        Замер длительности этапа входа в self.timings (секунды)
+
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    async def close(self):
+        """
+        Закрытие контекста входа и, если браузер запускался этим объектом, самого браузера
+
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._own_browser:
+            await self.browser.close()
+        else:
+            await self.context.close()
 
     async def obtain_token(self, login, password):
         """
@@ -30,19 +68,22 @@ class AUTH(AsyncClass):
         :param password: Пароль от mos.ru
         :return: str
         """
-        await self.page.goto(AUTH_URL)
-        await self.page.fill('#login', login)
-        await self.page.fill('#password', password)
-        await self.page.click('#bind')
+        async with self._stage('page_load'):
+            await self.page.goto(AUTH_URL)
+
+        async with self._stage('submit'):
+            await self.page.fill('#login', login)
+            await self.page.fill('#password', password)
+            await self.page.click('#bind')
 
-        answer = await self.page.wait_for_event("request", lambda req: req.url in AUTH_STATES)
-        state = AUTH_STATES[answer.url]
+            answer = await self.page.wait_for_event("request", lambda req: req.url in AUTH_STATES)
+            state = AUTH_STATES[answer.url]
 
         if state == 'SUCCESS':
             return await self._obtain_cookie()
 
         elif state == 'INCORRECT_CREDS':
-            await self.browser.close()
+            await self.close()
             raise InvalidCredentialsError
 
         return state
@@ -53,18 +94,20 @@ class AUTH(AsyncClass):
         :param sms_code: 2fa confirm code
         :return: str
         """
-        await self.page.fill('#sms-code', sms_code)  # rr
-        await self.page.click('#verifyBtn')
+        async with self._stage('2fa'):
+            await self.page.fill('#sms-code', sms_code)  # rr
+            await self.page.click('#verifyBtn')
 
-        answer = await self.page.wait_for_event("request", lambda req: req.url in FA_STATES)
-        status = FA_STATES[answer.url]
+            answer = await self.page.wait_for_event("request", lambda req: req.url in FA_STATES)
+            status = FA_STATES[answer.url]
+
+            if status == 'TRUST':
+                await self.page.click("#disagree")
+                await self.page.wait_for_event("request", lambda req: req.url == SUCCESS_URL)
 
         if status == 'FAILED_CODE':
-            await self.browser.close()
+            await self.close()
             raise Invalid2FACode
-        elif status == 'TRUST':
-            await self.page.click("#disagree")
-            await self.page.wait_for_event("request", lambda req: req.url == SUCCESS_URL)
 
         return await self._obtain_cookie()
 
@@ -73,8 +116,99 @@ class AUTH(AsyncClass):
         Получить желаемый токен
         :return: str
         """
-        for cookie in await self.context.cookies():
+        async with self._stage('cookie'):
+            cookies = await self.context.cookies()
+
+        for cookie in cookies:
             if cookie['name'] == 'aupd_token':
-                await self.browser.close()
+                await self.close()
                 return cookie['value']
         raise UnknownError
+
+
+class AuthPool(AsyncClass):
+    """
+    Пул заранее запущенных браузеров для массового входа: каждый вход получает отдельный контекст
+    в одном из браузеров, контекст закрывается после входа, браузер остаётся запущенным
+
+    """
+
+    async def __ainit__(self, ap, browsers=2, concurrency=8, **launch_options):
+        """
+        :param ap: Объект async_playwright
+        :param browsers: Количество запущенных браузеров
+        :param concurrency: Максимальное число одновременных входов
+        :param launch_options: Параметры запуска firefox
+
+        """
+        self.ap = ap
+        self.launch_options = launch_options
+        self.browsers = list(await asyncio.gather(*(ap.firefox.launch(**launch_options) for _ in range(browsers))))
+        self.timings: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._relaunch = asyncio.Lock()
+        self._next = 0
+
+    async def _browser(self):
+        """
+        Следующий браузер по кругу. Упавший браузер перезапускается
+
+        """
+        index = self._next % len(self.browsers)
+        self._next += 1
+        if not self.browsers[index].is_connected():
+            async with self._relaunch:
+                # Пока ждали блокировку, браузер мог перезапустить другой вход
+                if not self.browsers[index].is_connected():
+                    self.browsers[index] = await self.ap.firefox.launch(**self.launch_options)
+        return self.browsers[index]
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        Отдельный вход: async with pool.session() as auth: token = await auth.obtain_token(...)
+
+        """
+        async with self._semaphore:
+            auth = await AUTH(browser=await self._browser())
+            try:
+                yield auth
+            finally:
+                for stage, seconds in auth.timings.items():
+                    self.timings[stage].append(seconds)
+                await auth.close()
+
+    async def obtain_token(self, login, password, get_2fa_code=None):
+        """
+        Полный вход в отдельном контексте
+        :param login: Логин от mos.ru
+        :param password: Пароль от mos.ru
+        :param get_2fa_code: Корутинная функция без аргументов, возвращающая 2FA-код. Без неё при запросе
+                             2FA-кода возникает TwoFactorRequiredError
+        :return: str
+
+        """
+        async with self.session() as auth:
+            token = await auth.obtain_token(login, password)
+            if token == '2FA_NEEDED':
+                if get_2fa_code is None:
+                    raise TwoFactorRequiredError()
+                token = await auth.proceed_2fa(await get_2fa_code())
+            return token
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Средняя длительность этапов входа в секундах по последним 1000 входам
+
+        """
+        return {stage: sum(values) / len(values) for stage, values in self.timings.items() if values}
+
+    async def close(self):
+        await asyncio.gather(*(browser.close() for browser in self.browsers), return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
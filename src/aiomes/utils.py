@@ -1,10 +1,103 @@
-from typing import List
+import json
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache, wraps
+from typing import List, Iterator
+from .metrics import request_time
 
+try:
+    from orjson import loads as default_json_loads
+except ImportError:
+    try:
+        from msgspec.json import decode as default_json_loads
+    except ImportError:
+        default_json_loads = json.loads
 
 MARK_WEIGHTS_SYMBOLS = {1: '\u00B9', 2: '\u00B2', 3: '\u00B3', 4: '\u2074', 5: '\u2075'}
 
 
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> datetime:
+    """
+    Разбор даты / времени API ('2024-09-01', '2024-09-01 08:30:00.000').
+    Результаты кэшируются: в массовых выгрузках одни и те же даты повторяются тысячи раз
+
+    """
+    return datetime.fromisoformat(value)
+
+
 async def parse_marks_from_lesson(marks) -> List[str]:
     return [
         f'{mark["value"]+mark["weight"]}' for mark in marks
     ]
+
+
+def api_method(*fields):
+    """
+    Декоратор методов Client: перед вызовом загружает профиль, если нужные поля ещё не известны.
+    При подключённых hooks сообщает время построения результата (span build) - время метода без учёта запросов
+
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            await self.ensure_profile(*fields)
+            if not self.hooks:
+                return await func(self, *args, **kwargs)
+
+            parent = request_time.get()
+            spent = [0.0]
+            context = request_time.set(spent)
+            started, clock = time.time(), time.perf_counter()
+            try:
+                return await func(self, *args, **kwargs)
+            finally:
+                duration = time.perf_counter() - clock
+                request_time.reset(context)
+                if parent is not None:
+                    parent[0] += duration
+                self._emit('build', func.__name__, started, max(0.0, duration - spent[0]))
+        return wrapper
+    return decorator
+
+
+# Параметры, которые сами указывают, чьи данные запрашиваются: учащегося, его договора или школы
+SCOPE_PARAMS = frozenset(('student_id', 'student_profile_id', 'profile_id', 'contract_id', 'personId',
+                          'contingent_guid', 'school_id', 'class_unit_id'))
+
+
+def make_request_key(method, query_options, identity) -> str:
+    """
+    Ключ запроса: endpoint и отсортированные параметры. Токен в ключ не входит, поэтому ключ
+    не меняется после повторного входа или обновления токена
+    :param identity: Идентификатор учащегося (user_id). Добавляется только к запросам без SCOPE_PARAMS, например профилю
+
+    """
+    params = '&'.join(f'{name}={value}' for name, value in sorted(query_options.items()))
+    if SCOPE_PARAMS.isdisjoint(query_options):
+        return f'{identity}:{method}:{params}'
+    return f'{method}:{params}'
+
+
+def dump_row(item) -> dict:
+    """
+    Модель или запись в виде словаря, пригодного для JSON: даты - в формате ISO, кортежи записей - списками
+
+    """
+    row = item._asdict() if isinstance(item, tuple) else dict(item)
+    return {name: value.isoformat() if isinstance(value, datetime) else list(value) if isinstance(value, tuple)
+            else value for name, value in row.items()}
+
+
+def date_range(from_date, to_date) -> Iterator:
+    """
+    Все даты от from_date до to_date включительно
+
+    """
+    for offset in range((to_date - from_date).days + 1):
+        yield from_date + timedelta(offset)
+
+
+def chunked(items: list, size: int) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
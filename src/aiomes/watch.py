@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import AsyncIterator
+from .errors import *
+from .sync import BaseSyncStore, MemorySyncStore
+
+
+class NotificationWatcher:
+    """
+    Опрос уведомлений учащегося с адаптивным интервалом: после новых событий интервал сокращается,
+    при их отсутствии - увеличивается. Каждое событие выдаётся один раз; курсор сохраняется в store
+    после обработки пачки, поэтому после перезапуска опрос продолжается с того же места
+
+    """
+
+    def __init__(self, client, store: BaseSyncStore = None, interval=60, min_interval=15, max_interval=600,
+                 replay=False, max_seen=1000, semaphore: asyncio.Semaphore = None):
+        """
+        :param client: Клиент учащегося
+        :param store: Хранилище курсора. По умолчанию - MemorySyncStore
+        :param interval: Начальный интервал опроса в секундах
+        :param min_interval: Минимальный интервал опроса в секундах
+        :param max_interval: Максимальный интервал опроса в секундах
+        :param replay: При первом запуске выдать уже существующие уведомления. По умолчанию они пропускаются
+        :param max_seen: Сколько последних событий помнить для устранения дубликатов
+        :param semaphore: Общее ограничение одновременных опросов для множества учащихся
+
+        """
+        self.client = client
+        self.store = store if store is not None else MemorySyncStore()
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.replay = replay
+        self.max_seen = max_seen
+        self.semaphore = semaphore
+        self._pending = None
+
+    async def poll(self) -> list:
+        """
+        Однократный опрос: новые уведомления от старых к новым
+
+        """
+        if self.semaphore is not None:
+            async with self.semaphore:
+                notifications = await self.client.get_notifications()
+        else:
+            notifications = await self.client.get_notifications()
+
+        state = await self.store.load(self.client.user_id, 'notifications')
+        first_run = state is None
+        state = state or {'cursor': None, 'seen': []}
+        cursor = datetime.fromisoformat(state['cursor']) if state['cursor'] else None
+        seen = set(state['seen'])
+
+        new = []
+        for notification in sorted(notifications, key=lambda n: n.event_date):
+            identity = _identity(notification)
+            if (cursor is None or notification.event_date >= cursor) and identity not in seen:
+                seen.add(identity)
+                new.append(notification)
+        self._pending = new, state
+        return [] if first_run and not self.replay else new
+
+    async def commit(self):
+        """
+        Сохранение курсора после обработки результатов poll
+
+        """
+        if self._pending is None:
+            return
+        new, state = self._pending
+        self._pending = None
+        if new:
+            state['cursor'] = new[-1].event_date.isoformat()
+            state['seen'] = (state['seen'] + [_identity(notification) for notification in new])[-self.max_seen:]
+        await self.store.save(self.client.user_id, 'notifications', state)
+
+    async def __aiter__(self) -> AsyncIterator:
+        interval = self.interval
+        while True:
+            try:
+                new = await self.poll()
+            except ErrorHandler as exc:
+                if not _transient(exc):
+                    raise
+                interval = min(self.max_interval, interval * 2)
+            else:
+                for notification in new:
+                    yield notification
+                await self.commit()
+
+                if new:
+                    interval = max(self.min_interval, interval / 2)
+                else:
+                    interval = min(self.max_interval, interval * 1.5)
+
+            await asyncio.sleep(interval)
+
+
+def _identity(notification) -> str:
+    key = '|'.join(str(value) for value in (
+        notification.event_date, notification.event_name, notification.subject_name,
+        notification.mark_value, notification.hw_description
+    ))
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _transient(exc) -> bool:
+    """
+    Временная ошибка, после которой опрос стоит продолжить
+
+    """
+    if isinstance(exc, RequestError):
+        return exc.error_code == 429 or exc.error_code >= 500
+    return isinstance(exc, (TransportError, CircuitOpenError))
@@ -0,0 +1,30 @@
+"""
+
+Имитация API для тестов: make_responder из benchmarks/mock_server.py со счётчиком запросов по endpoint
+
+"""
+from aiohttp import web
+from mock_server import make_responder
+
+
+def counting_app(hits, latency=0.05, override=None) -> web.Application:
+    """
+    :param hits: Counter, в который записывается число запросов к каждому endpoint
+    :param latency: Задержка ответа в секундах, чтобы одновременные запросы пересекались
+    :param override: Корутинная функция override(request) -> web.Response или None - ответ вместо имитации
+
+    """
+    respond = make_responder(rows=5, latency=latency)
+
+    async def handler(request):
+        hits[request.match_info['method']] += 1
+        if override is not None:
+            response = await override(request)
+            if response is not None:
+                return response
+        status, body = await respond(request.path, request.query_string, request.headers)
+        return web.Response(status=status, body=body, content_type='application/json')
+
+    app = web.Application()
+    app.router.add_route('GET', '/api/{method:.*}', handler)
+    return app
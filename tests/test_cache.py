@@ -0,0 +1,68 @@
+import asyncio
+import itertools
+
+import aiomes
+import pytest
+from aiomes import cache
+from aiomes.utils import make_request_key
+
+
+def entry(size):
+    return aiomes.CacheEntry(b'x' * size, 0.0, None, None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Время обращения - строго возрастающее, чтобы порядок LRU не зависел от разрешения часов
+    ticks = itertools.count(1)
+    monkeypatch.setattr(cache.time, 'time', lambda: float(next(ticks)))
+
+
+@pytest.mark.parametrize('backend', [lambda: aiomes.MemoryCache(max_size=10),
+                                     lambda: aiomes.SQLiteCache(':memory:', max_size=10)])
+def test_least_recently_used_is_evicted(backend, clock):
+    async def main():
+        storage = backend()
+        await storage.set('a', entry(4))
+        await storage.set('b', entry(4))
+        await storage.get('a')
+        await storage.set('c', entry(4))
+        result = [await storage.get(key) is not None for key in 'abc']
+        await storage.close()
+        return result
+
+    assert asyncio.run(main()) == [True, False, True]
+
+
+@pytest.mark.parametrize('backend', [lambda: aiomes.MemoryCache(max_size=10),
+                                     lambda: aiomes.SQLiteCache(':memory:', max_size=10)])
+def test_replaced_entry_is_counted_once(backend, clock):
+    async def main():
+        storage = backend()
+        await storage.set('a', entry(4))
+        await storage.set('b', entry(4))
+        await storage.set('b', entry(5))
+        result = [await storage.get(key) is not None for key in 'ab']
+        await storage.close()
+        return result
+
+    assert asyncio.run(main()) == [True, True]
+
+
+def test_sqlite_eviction_keeps_newest_within_size(clock):
+    async def main():
+        storage = aiomes.SQLiteCache(':memory:', max_size=10)
+        for key in 'abcde':
+            await storage.set(key, entry(3))
+        result = [key for key in 'abcde' if await storage.get(key) is not None]
+        await storage.close()
+        return result
+
+    assert asyncio.run(main()) == ['c', 'd', 'e']
+
+
+def test_request_key_does_not_depend_on_token():
+    options = {'student_id': 1, 'date': '2024-09-02'}
+    assert make_request_key('family/web/v1/schedule', options, 'a') == \
+        make_request_key('family/web/v1/schedule', dict(reversed(options.items())), 'b')
+    assert make_request_key('family/web/v1/profile', {}, 'a') != make_request_key('family/web/v1/profile', {}, 'b')
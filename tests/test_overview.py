@@ -0,0 +1,56 @@
+import asyncio
+from collections import Counter
+from datetime import date
+
+import aiomes
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from server import counting_app
+
+PROFILE = {'user_id': 1, 'contract_id': 3000, 'school_id': 500, 'class_unit': 2000}
+DAY = date(2024, 9, 2)
+
+
+def slow_menu():
+    async def override(request):
+        if request.match_info['method'] == 'family/web/v1/menu':
+            await asyncio.sleep(5)
+        elif request.match_info['method'].startswith('family/web/v1/visits'):
+            return web.Response(status=500, body=b'{}', content_type='application/json')
+
+    return override
+
+
+async def overview(override, **options):
+    hits = Counter()
+    async with TestServer(counting_app(hits, latency=0.01, override=override)) as server:
+        transport = aiomes.Transport(base_url=str(server.make_url('/api/')))
+        user = await aiomes.Client('token', transport=transport, profile=PROFILE,
+                                   retry=aiomes.RetryPolicy(attempts=1))
+        try:
+            result = await user.get_overview(DAY, DAY, **options)
+            leftover = [task for task in asyncio.all_tasks()
+                        if task is not asyncio.current_task() and 'get_' in repr(task.get_coro())]
+            return result, leftover
+        finally:
+            await transport.close()
+
+
+def test_late_parts_are_cancelled_and_reported():
+    result, leftover = asyncio.run(overview(slow_menu(), parts=('marks', 'homeworks', 'menu'), timeout=0.5))
+    assert set(result.results) == {'marks', 'homeworks'}
+    assert isinstance(result.errors['menu'], aiomes.RequestTimeoutError)
+    assert leftover == []
+
+
+def test_failed_part_does_not_stop_others():
+    result, _ = asyncio.run(overview(slow_menu(), parts=('marks', 'visits')))
+    assert set(result.results) == {'marks'}
+    assert isinstance(result.errors['visits'], aiomes.RequestError)
+    assert result.errors['visits'].error_code == 500
+
+
+def test_unknown_part_is_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(overview(None, parts=('marks', 'grades')))
@@ -0,0 +1,21 @@
+import asyncio
+
+import aiomes
+
+
+async def nap(client):
+    await asyncio.sleep(0 if client.token == 'token0' else 10)
+    return client.token
+
+
+def test_early_exit_from_map_awaits_pending_calls():
+    async def main():
+        async with await aiomes.ClientPool([f'token{i}' for i in range(6)], concurrency=3, lazy=True) as pool:
+            results = pool.map(nap)
+            async for result in results:
+                break
+            await results.aclose()
+            leftover = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            return result.result, leftover
+
+    assert asyncio.run(main()) == ('token0', [])
@@ -0,0 +1,62 @@
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+
+import aiomes
+from aiohttp.test_utils import TestServer
+from server import counting_app
+
+MENU = 'family/web/v1/menu'
+SHORT = 'family/web/v1/schedule/short'
+
+
+def student(school_id=500, class_unit=2000):
+    return SimpleNamespace(school_id=school_id, class_unit=class_unit)
+
+
+def test_menu_key_is_per_school_without_contract():
+    shared = aiomes.SharedResources()
+    key = shared.key(student(), MENU, {'date': '2024-09-02', 'contract_id': 1})
+    assert key == shared.key(student(class_unit=2001), MENU, {'date': '2024-09-02', 'contract_id': 2})
+    assert key != shared.key(student(school_id=501), MENU, {'date': '2024-09-02', 'contract_id': 1})
+    assert key != shared.key(student(), MENU, {'date': '2024-09-03', 'contract_id': 1})
+    assert 'contract_id' not in key
+
+
+def test_short_schedule_key_is_per_class_without_student():
+    shared = aiomes.SharedResources()
+    key = shared.key(student(), SHORT, {'student_id': 1, 'dates': '2024-09-02'})
+    assert key == shared.key(student(school_id=501), SHORT, {'student_id': 2, 'dates': '2024-09-02'})
+    assert key != shared.key(student(class_unit=2001), SHORT, {'student_id': 1, 'dates': '2024-09-02'})
+    assert 'student_id' not in key
+
+
+def test_unknown_scope_or_endpoint_is_not_shared():
+    shared = aiomes.SharedResources()
+    assert shared.key(student(school_id=None), MENU, {'date': '2024-09-02', 'contract_id': 1}) is None
+    assert shared.key(student(), 'family/web/v1/marks', {'student_id': 1}) is None
+
+
+def test_one_request_per_school():
+    async def main():
+        hits = Counter()
+        async with TestServer(counting_app(hits)) as server:
+            transport = aiomes.Transport(base_url=str(server.make_url('/api/')))
+            shared = aiomes.SharedResources()
+            clients = [await aiomes.Client(f'token{i}', transport=transport, shared=shared,
+                                           profile={'user_id': i, 'contract_id': 3000 + i, 'school_id': 500 + i % 2,
+                                                    'class_unit': 2000})
+                       for i in range(6)]
+            first = await asyncio.gather(*(client.get_menu('2024-09-02') for client in clients))
+            again = await asyncio.gather(*(client.get_menu('2024-09-02') for client in clients))
+            short = await asyncio.gather(*(client.get_schedule_short(['2024-09-02']) for client in clients))
+            await shared.close()
+            await transport.close()
+        return hits, first, again, short, shared.stats
+
+    hits, first, again, short, stats = asyncio.run(main())
+    assert hits[MENU] == 2
+    assert hits[SHORT] == 1
+    assert all(menu for menu in first) and again == first
+    assert all(schedule == short[0] for schedule in short)
+    assert stats == {'requests': 18, 'fetches': 3}
@@ -0,0 +1,92 @@
+import asyncio
+from collections import Counter
+
+import aiomes
+import pytest
+from aiohttp.test_utils import TestServer
+from server import counting_app
+
+
+def test_concurrent_calls_share_one_result():
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def main():
+        single_flight = aiomes.SingleFlight()
+        results = await asyncio.gather(*(single_flight.do('key', load) for _ in range(5)))
+        after = await single_flight.do('key', load)
+        return results, after, single_flight.stats
+
+    results, after, stats = asyncio.run(main())
+    assert calls == 2
+    assert all(result is results[0] for result in results) and after is not results[0]
+    assert stats == {'calls': 2, 'deduplicated': 4, 'in_flight': 0}
+
+
+def test_error_reaches_every_waiter():
+    async def load():
+        await asyncio.sleep(0.01)
+        raise aiomes.RequestError(500)
+
+    async def main():
+        single_flight = aiomes.SingleFlight()
+        return await asyncio.gather(*(single_flight.do('key', load) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, aiomes.RequestError) and error.error_code == 500 for error in errors)
+
+
+def test_cancelled_waiter_does_not_cancel_request():
+    async def load():
+        await asyncio.sleep(0.05)
+        return 'body'
+
+    async def main():
+        single_flight = aiomes.SingleFlight()
+        first = asyncio.ensure_future(single_flight.do('key', load))
+        second = asyncio.ensure_future(single_flight.do('key', load))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 'body'
+
+
+def test_pool_sends_school_info_once_for_all_students():
+    async def main():
+        hits = Counter()
+        async with TestServer(counting_app(hits)) as server:
+            transport = aiomes.Transport(base_url=str(server.make_url('/api/')))
+            profiles = {f'token{i}': {'user_id': i, 'class_unit': 2000, 'school_id': 500} for i in range(5)}
+            async with await aiomes.ClientPool(profiles, transport=transport, profiles=profiles) as pool:
+                results = [result async for result in pool.map('get_school_info')]
+                stats = pool.client_options['single_flight'].stats
+            await transport.close()
+        return hits, results, stats
+
+    hits, results, stats = asyncio.run(main())
+    assert hits['family/web/v1/school_info'] == 1
+    assert all(result.error is None and result.result.name for result in results)
+    assert stats['deduplicated'] == 4
+
+
+@pytest.mark.parametrize('method', ['get_marks', 'get_menu'])
+def test_student_requests_are_not_merged(method):
+    async def main():
+        hits = Counter()
+        async with TestServer(counting_app(hits)) as server:
+            transport = aiomes.Transport(base_url=str(server.make_url('/api/')))
+            profiles = {f'token{i}': {'user_id': i, 'contract_id': 3000 + i, 'school_id': 500} for i in range(3)}
+            async with await aiomes.ClientPool(profiles, transport=transport, profiles=profiles) as pool:
+                results = [result async for result in pool.map(method)]
+            await transport.close()
+        return hits, results
+
+    hits, results = asyncio.run(main())
+    assert sum(hits.values()) == 3
+    assert all(result.error is None for result in results)
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import date, timedelta
+
+import aiomes
+import pytest
+from aiohttp.test_utils import TestServer
+from mock_server import make_app
+
+
+def marks(*days):
+    return [{'mark_date': str(day), 'subject_name': 'Алгебра', 'value': '5'} for day in days]
+
+
+async def coverage(storage, student=1):
+    return await storage._execute(storage._ranges, 'marks', student)
+
+
+def test_adjacent_ranges_are_merged():
+    async def main():
+        storage = aiomes.SQLiteStorage(':memory:', settle_days=0)
+        await storage.put('marks', 1, marks(date(2024, 9, 2)), date(2024, 9, 1), date(2024, 9, 5))
+        await storage.put('marks', 1, marks(date(2024, 9, 8)), date(2024, 9, 6), date(2024, 9, 10))
+        await storage.put('marks', 1, [], date(2024, 9, 3), date(2024, 9, 7))
+        ranges = await coverage(storage)
+        await storage.close()
+        return ranges
+
+    assert asyncio.run(main()) == [('2024-09-01', '2024-09-10')]
+
+
+def test_gaps_between_separate_ranges():
+    async def main():
+        storage = aiomes.SQLiteStorage(':memory:', settle_days=0)
+        await storage.put('marks', 1, [], date(2024, 9, 1), date(2024, 9, 5))
+        await storage.put('marks', 1, [], date(2024, 9, 10), date(2024, 9, 12))
+        await storage.put('marks', 2, [], date(2024, 8, 1), date(2024, 10, 1))
+        result = await storage.gaps('marks', 1, date(2024, 8, 30), date(2024, 9, 15))
+        await storage.close()
+        return result
+
+    assert asyncio.run(main()) == [(date(2024, 8, 30), date(2024, 8, 31)), (date(2024, 9, 6), date(2024, 9, 9)),
+                                   (date(2024, 9, 13), date(2024, 9, 15))]
+
+
+def test_recent_days_stay_uncovered():
+    today = date.today()
+
+    async def main():
+        storage = aiomes.SQLiteStorage(':memory:', settle_days=14)
+        await storage.put('marks', 1, marks(today - timedelta(20), today), today - timedelta(30), today)
+        result = await storage.gaps('marks', 1, today - timedelta(30), today)
+        rows = await storage.query('marks', 1, today - timedelta(30), today)
+        await storage.close()
+        return result, rows
+
+    gaps, rows = asyncio.run(main())
+    assert gaps == [(today - timedelta(13), today)]
+    assert len(rows) == 2
+
+
+def test_put_replaces_rows_of_range():
+    async def main():
+        storage = aiomes.SQLiteStorage(':memory:', settle_days=0)
+        await storage.put('marks', 1, marks(date(2024, 9, 2), date(2024, 9, 3)), date(2024, 9, 1), date(2024, 9, 5))
+        await storage.put('marks', 1, marks(date(2024, 9, 3)), date(2024, 9, 3), date(2024, 9, 5))
+        rows = await storage.query('marks', 1, date(2024, 9, 1), date(2024, 9, 5))
+        await storage.close()
+        return rows
+
+    assert [row['mark_date'] for row in asyncio.run(main())] == ['2024-09-02', '2024-09-03']
+
+
+def test_client_query_fetches_only_gaps():
+    async def main():
+        async with TestServer(make_app(rows=20)) as server:
+            transport = aiomes.Transport(base_url=str(server.make_url('/api/')))
+            storage = aiomes.SQLiteStorage(':memory:', settle_days=0)
+            user = await aiomes.Client('token', transport=transport, storage=storage, lazy=True)
+            first = await user.query('marks', date(2024, 9, 1), date(2024, 9, 30))
+            gaps = await storage.gaps('marks', user.user_id, date(2024, 9, 1), date(2024, 10, 15))
+            offline = await user.query('marks', date(2024, 9, 1), date(2024, 9, 30), offline=True)
+            await storage.close()
+            await transport.close()
+            return first, gaps, offline
+
+    first, gaps, offline = asyncio.run(main())
+    assert first and offline == first
+    assert gaps == [(date(2024, 10, 1), date(2024, 10, 15))]
+
+
+def test_query_checks_storage_and_kind():
+    async def main():
+        user = await aiomes.Client('token', lazy=True)
+        with pytest.raises(ValueError):
+            await user.query('marks', date(2024, 9, 1), date(2024, 9, 30))
+        with pytest.raises(ValueError):
+            await user.query_final_marks(5)
+        user.storage = aiomes.SQLiteStorage(':memory:')
+        with pytest.raises(ValueError):
+            await user.query('grades', date(2024, 9, 1), date(2024, 9, 30))
+        await user.storage.close()
+        await user.close()
+
+    asyncio.run(main())
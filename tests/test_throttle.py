@@ -0,0 +1,64 @@
+import aiomes
+import pytest
+from aiomes import throttle
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(throttle.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_opens_after_threshold(clock):
+    breaker = aiomes.CircuitBreaker(failure_threshold=3, recovery_time=30)
+    for _ in range(2):
+        breaker.check()
+        breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    with pytest.raises(aiomes.CircuitOpenError):
+        breaker.check()
+
+
+def test_success_resets_failures(clock):
+    breaker = aiomes.CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_half_open_allows_single_probe(clock):
+    breaker = aiomes.CircuitBreaker(failure_threshold=1, recovery_time=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.state == 'half-open'
+    breaker.check()
+    with pytest.raises(aiomes.CircuitOpenError):
+        breaker.check()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    breaker.check()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = aiomes.CircuitBreaker(failure_threshold=1, recovery_time=30)
+    breaker.record_failure()
+    clock[0] += 30
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    clock[0] += 29
+    with pytest.raises(aiomes.CircuitOpenError):
+        breaker.check()
+    clock[0] += 1
+    breaker.check()
+
+
+def test_retry_policy_needs_an_attempt():
+    with pytest.raises(ValueError):
+        aiomes.RetryPolicy(attempts=0)
+    assert aiomes.RetryPolicy(attempts=1).attempts == 1
@@ -0,0 +1,83 @@
+import asyncio
+from collections import Counter
+
+import aiomes
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from server import counting_app
+
+PROFILE = {'user_id': 1, 'contract_id': 3000, 'school_id': 500, 'class_unit': 2000}
+
+
+def accept(*tokens):
+    seen = Counter()
+
+    async def override(request):
+        token = request.headers.get('auth-token')
+        seen[token] += 1
+        if token not in tokens:
+            return web.Response(status=401, body=b'{}', content_type='application/json')
+
+    return seen, override
+
+
+def manager(*tokens):
+    calls = []
+
+    async def refresh(account):
+        calls.append(account)
+        await asyncio.sleep(0.01)
+        return tokens[len(calls) - 1]
+
+    return calls, aiomes.TokenManager(refresh)
+
+
+async def run(override, token_manager, *methods):
+    hits = Counter()
+    async with TestServer(counting_app(hits, override=override)) as server:
+        transport = aiomes.Transport(base_url=str(server.make_url('/api/')))
+        await token_manager.set('account', 'stale')
+        user = await aiomes.Client(transport=transport, token_manager=token_manager, account='account',
+                                   profile=PROFILE)
+        try:
+            return await asyncio.gather(*(getattr(user, method)() for method in methods)), user.token
+        finally:
+            await transport.close()
+
+
+def test_unauthorized_request_is_retried_with_new_token():
+    seen, override = accept('fresh')
+    calls, token_manager = manager('fresh')
+    (info,), token = asyncio.run(run(override, token_manager, 'get_school_info'))
+    assert info.name and token == 'fresh'
+    assert calls == ['account']
+    assert seen == {'stale': 1, 'fresh': 1}
+
+
+def test_concurrent_unauthorized_requests_refresh_once():
+    seen, override = accept('fresh')
+    calls, token_manager = manager('fresh', 'unexpected')
+    results, _ = asyncio.run(run(override, token_manager, 'get_school_info', 'get_menu', 'get_notifications'))
+    assert all(result is not None for result in results)
+    assert calls == ['account']
+    assert seen == {'stale': 3, 'fresh': 3}
+
+
+def test_request_is_retried_only_once():
+    seen, override = accept()
+    calls, token_manager = manager('fresh', 'fresher')
+    with pytest.raises(aiomes.RequestError) as error:
+        asyncio.run(run(override, token_manager, 'get_school_info'))
+    assert error.value.error_code == 401
+    assert calls == ['account']
+    assert seen == {'stale': 1, 'fresh': 1}
+
+
+def test_rejected_refresh_result_is_not_sent():
+    seen, override = accept('fresh')
+    calls, token_manager = manager('2FA_NEEDED')
+    with pytest.raises(aiomes.TokenRefreshError):
+        asyncio.run(run(override, token_manager, 'get_school_info'))
+    assert seen == {'stale': 1}
+    assert isinstance(token_manager.errors['account'], aiomes.TokenRefreshError)